@@ -1,88 +1,276 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 from .core_engine.url_checker import analyze_url
 from .core_engine.email_checker import analyze_email
 from .core_engine.sms_checker import analyze_sms
-from .models import User, Base, ScanLog
+from .core_engine.utils import warm_up_tld_extractor
+from .models import User, Base, ScanLog, ScanCounter, upgrade_schema, hash_password, verify_password
 from .db import SessionLocal, engine
-from .auth_utils import generate_token, get_current_user_from_token, require_auth
+from sqlalchemy import func, insert, update
+from .auth_utils import (
+    generate_token, get_current_user_from_token, require_auth,
+    get_cached_user, cache_user, invalidate_user
+)
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from cachetools import TTLCache
+import atexit
+import hashlib
+import orjson
 import os
+import queue
 import re
+import secrets
+import signal
+import sys
+import threading
+import time
 
 app = Flask(__name__)
 CORS(app)
+# Static files revalidate by ETag unless their name is fingerprinted (see serve_frontend)
+app.config["SEND_FILE_MAX_AGE_DEFAULT"] = 0
+# Behind a server that honours X-Sendfile, let it send the file bytes
+app.use_x_sendfile = os.getenv("USE_X_SENDFILE", "").lower() in ("1", "true", "yes")
 
 # Initialize database tables
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
+
+# Build the public suffix trie at startup instead of inside the first scan request
+warm_up_tld_extractor()
+
+@app.teardown_appcontext
+def remove_session(exception=None):
+    """Release the request's database session"""
+    SessionLocal.remove()
+
+# Dialects with INSERT ... ON CONFLICT; others fall back to update-then-insert
+if engine.dialect.name == "postgresql":
+    from sqlalchemy.dialects.postgresql import insert as upsert
+elif engine.dialect.name == "sqlite":
+    from sqlalchemy.dialects.sqlite import insert as upsert
+else:
+    upsert = None
 
 # ===== GLOBAL STATS TRACKING =====
+# Scan counts live in the scan_counters table so every worker sees the same
+# numbers; only the most recent scans of this process are kept in memory.
 scan_stats = {
-    "email": {"total": 0, "safe": 0, "suspicious": 0, "phishing": 0, "latest": []},
-    "sms": {"total": 0, "safe": 0, "suspicious": 0, "phishing": 0, "latest": []},
-    "url": {"total": 0, "safe": 0, "suspicious": 0, "phishing": 0, "latest": []},
-    "pie": {"phishing": 0, "suspicious": 0, "safe": 0}
+    "email": {"latest": deque(maxlen=10)},
+    "sms": {"latest": deque(maxlen=10)},
+    "url": {"latest": deque(maxlen=10)}
 }
+# Guards the latest deques: request threads append while the dashboard reads
+_stats_lock = threading.Lock()
+
+# ===== SCAN LOG WRITER =====
+# Scan logs are queued by the request thread and written in batches by a
+# background thread, so a scan never waits on its own INSERT + commit.
+LOG_BATCH_SIZE = 1024
+LOG_FLUSH_INTERVAL = 0.5  # seconds to wait for more logs before writing a batch
+LOG_QUEUE_SIZE = 10_000  # pending logs held while the database is slow or locked
+LOG_QUEUE_PUT_TIMEOUT = 0.1  # seconds a scan waits for queue space before its log is dropped
+LOG_SHUTDOWN_TIMEOUT = 5.0  # seconds shutdown waits for queued logs before abandoning them
+
+_log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+# Set at shutdown: the writer stops waiting for more logs, drains the queue and exits
+_stop_writer = threading.Event()
+# Logs dropped because the queue stayed full
+_dropped_scan_logs = 0
+_dropped_lock = threading.Lock()
+# Built once; SQLAlchemy's compiled cache then reuses its SQL for every batch
+_SCANLOG_INSERT = ScanLog.__table__.insert()
+
+def _add_to_counter(db, scan_type, day, verdict, count):
+    """Portable counter increment: bump the existing row, or insert it if there is none"""
+    key = (ScanCounter.scan_type == scan_type, ScanCounter.date == day, ScanCounter.verdict == verdict)
+    bumped = db.execute(update(ScanCounter).where(*key).values(count=ScanCounter.count + count))
+    if not bumped.rowcount:
+        db.execute(insert(ScanCounter).values(scan_type=scan_type, date=day, verdict=verdict, count=count))
+
+def _count_scans(db, batch):
+    """Add a batch of (row, verdict) entries to the scan counters"""
+    counts = Counter(
+        (row["scan_type"].lower(), row["created_at"].date(), verdict)
+        for row, verdict in batch
+    )
+    for (scan_type, day, verdict), count in counts.items():
+        if upsert is None:
+            _add_to_counter(db, scan_type, day, verdict, count)
+            continue
+        stmt = upsert(ScanCounter).values(scan_type=scan_type, date=day, verdict=verdict, count=count)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["scan_type", "date", "verdict"],
+            set_={"count": ScanCounter.count + stmt.excluded.count}
+        )
+        db.execute(stmt)
+
+def _insert_scan_logs(db, batch):
+    """Insert (row, verdict) entries and add them to the counters in one transaction"""
+    # Core executemany insert: no ORM objects or unit-of-work bookkeeping
+    rows = [dict(row, result=orjson.dumps(row["result"]).decode()) for row, _ in batch]
+    db.execute(_SCANLOG_INSERT, rows)
+    _count_scans(db, batch)
+    db.commit()
+
+def _write_scan_logs(batch):
+    """
+    Persist a batch of (row, verdict) entries and their counts with a single commit.
+    If the batch fails, each entry is retried in its own transaction so one bad
+    row only loses itself.
+    """
+    db = SessionLocal()
+    try:
+        try:
+            _insert_scan_logs(db, batch)
+            return
+        except Exception:
+            db.rollback()
+            if len(batch) == 1:
+                app.logger.exception("Error saving scan log")
+                return
+            app.logger.exception("Error saving batch of %d scan logs, retrying one by one", len(batch))
+
+        for entry in batch:
+            try:
+                _insert_scan_logs(db, [entry])
+            except Exception:
+                db.rollback()
+                app.logger.exception("Error saving %s scan log, dropped it", entry[0]["scan_type"])
+    finally:
+        SessionLocal.remove()
+
+def _drain_loop(log_queue, stop):
+    """Collect queued scan logs into batches and write them until stopped and drained"""
+    while True:
+        try:
+            batch = [log_queue.get(timeout=LOG_FLUSH_INTERVAL)]
+        except queue.Empty:
+            if stop.is_set():
+                return
+            continue
+        deadline = time.monotonic() + LOG_FLUSH_INTERVAL
+        while len(batch) < LOG_BATCH_SIZE:
+            # Once stopping, take only what is already queued
+            remaining = 0 if stop.is_set() else deadline - time.monotonic()
+            try:
+                batch.append(log_queue.get(timeout=remaining) if remaining > 0 else log_queue.get_nowait())
+            except queue.Empty:
+                break
+        _write_scan_logs(batch)
+        for _ in batch:
+            log_queue.task_done()
+
+def flush_scan_logs():
+    """Block until every queued scan log has been written"""
+    if _log_writer.is_alive():
+        _log_queue.join()
+        return
+    batch = []
+    while True:
+        try:
+            batch.append(_log_queue.get_nowait())
+        except queue.Empty:
+            break
+    if batch:
+        _write_scan_logs(batch)
+
+def stop_scan_log_writer(timeout=LOG_SHUTDOWN_TIMEOUT):
+    """
+    Let the writer drain the queue and exit, waiting at most `timeout` seconds so
+    a stalled database cannot hold up shutdown; whatever is still queued is lost.
+    """
+    if _stop_writer.is_set():
+        return
+    _stop_writer.set()
+    _log_writer.join(timeout)
+    if _log_writer.is_alive():
+        app.logger.error(
+            "Scan log writer still busy after %.1fs; abandoning %d unwritten scan logs",
+            timeout, _log_queue.unfinished_tasks
+        )
+
+_log_writer = threading.Thread(
+    target=_drain_loop, args=(_log_queue, _stop_writer), name="scan-log-writer", daemon=True
+)
+_log_writer.start()
+atexit.register(stop_scan_log_writer)
+
+def _install_sigterm_flush():
+    """Flush pending scan logs on SIGTERM, then defer to the previous handler"""
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_sigterm(signum, frame):
+        stop_scan_log_writer()
+        if callable(previous):
+            previous(signum, frame)
+        elif previous != signal.SIG_IGN:
+            sys.exit(128 + signum)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
 
-# ===== DAILY STATS TRACKING =====
-# Structure: daily_stats[date_str][scan_type] = {"safe": count, "phishing": count}
-daily_stats = defaultdict(lambda: defaultdict(lambda: {"safe": 0, "phishing": 0}))
+# Signal handlers can only be installed from the main thread
+if threading.current_thread() is threading.main_thread():
+    _install_sigterm_flush()
+
+def _enqueue_scan_log(entry):
+    """Queue a scan log, waiting briefly for space; drop (and count) it if the writer is backed up"""
+    global _dropped_scan_logs
+    try:
+        _log_queue.put(entry, timeout=LOG_QUEUE_PUT_TIMEOUT)
+    except queue.Full:
+        with _dropped_lock:
+            _dropped_scan_logs += 1
+            dropped = _dropped_scan_logs
+        # First drop and every thousandth after, so a stalled database doesn't flood the log
+        if dropped == 1 or dropped % 1000 == 0:
+            app.logger.error("Scan log queue full; %d scan logs dropped so far", dropped)
 
 def update_stats(scan_type: str, verdict: str, input_value: str, summary: str = "", metadata: dict = None):
     """Update statistics after a scan and persist to database"""
     if scan_type not in scan_stats:
         return
     
-    scan_stats[scan_type]["total"] += 1
-    
-    verdict_lower = verdict.lower()
-    today = datetime.now().date().isoformat()
-    
-    if verdict_lower == "phishing":
-        scan_stats[scan_type]["phishing"] += 1
-        scan_stats["pie"]["phishing"] += 1
-        daily_stats[today][scan_type]["phishing"] += 1
-    elif verdict_lower == "suspicious":
-        scan_stats[scan_type]["suspicious"] += 1
-        scan_stats["pie"]["suspicious"] += 1
-        daily_stats[today][scan_type]["safe"] += 1
-    else:
-        scan_stats[scan_type]["safe"] += 1
-        scan_stats["pie"]["safe"] += 1
-        daily_stats[today][scan_type]["safe"] += 1
-    
-    # Create scan log in database
-    db = SessionLocal()
-    try:
-        import json
-        log_entry = ScanLog(
-            scan_type=scan_type.upper(),
-            input_value=input_value,
-            result=json.dumps({
-                "verdict": verdict,
-                "summary": summary,
-                "timestamp": datetime.now().isoformat(),
-                "details": metadata or {}
-            }),
-            created_at=datetime.utcnow()
-        )
-        db.add(log_entry)
-        db.commit()
-    except Exception as e:
-        print(f"Error saving scan log: {e}")
-        db.rollback()
-    finally:
-        db.close()
-
-    # Add to latest (keep last 10)
-    scan_stats[scan_type]["latest"].insert(0, {
-        "type": scan_type.upper(),
-        "summary": summary or input_value[:50],
+    # Request data can be any JSON type; the log columns are strings
+    if not isinstance(input_value, str):
+        input_value = "" if input_value is None else str(input_value)
+    if not isinstance(summary, str):
+        summary = "" if summary is None else str(summary)
+
+    # The row, the counters and the latest list share one normalised verdict
+    verdict = verdict.lower() if isinstance(verdict, str) else ""
+    if verdict not in ("phishing", "suspicious"):
+        verdict = "safe"
+
+    now = datetime.utcnow()
+
+    # Queue scan log for the background writer
+    row = {
+        "scan_type": scan_type.upper(),
+        "input_value": input_value,
         "verdict": verdict,
-        "timestamp": datetime.now().isoformat()
-    })
-    scan_stats[scan_type]["latest"] = scan_stats[scan_type]["latest"][:10]
+        "summary": summary[:256],
+        "result": metadata or {},  # serialized by the writer thread
+        "created_at": now
+    }
+    _enqueue_scan_log((row, verdict))
+
+    # Add to latest (the deque keeps the last 10)
+    with _stats_lock:
+        scan_stats[scan_type]["latest"].appendleft({
+            "type": scan_type.upper(),
+            "summary": summary or input_value[:50],
+            "verdict": verdict,
+            "timestamp": now.isoformat()
+        })
+
+def json_response(data, status=200):
+    """Serialize data with orjson into a JSON response"""
+    return app.response_class(orjson.dumps(data), status=status, mimetype="application/json")
 
 # Helper function to convert verdict to status format (for backward compatibility)
 def verdict_to_status(verdict: str) -> str:
@@ -99,10 +287,36 @@ def verdict_to_status(verdict: str) -> str:
 # AUTHENTICATION ENDPOINTS
 # -----------------------------
 
+# ===== LOGIN CACHES =====
+# Logins that named no existing user, so a burst of repeats skips the database.
+# Other workers are not told about registrations, so entries only live for a few
+# seconds: that bounds how long a new user can be refused elsewhere.
+MISSING_USER_TTL = 3
+_missing_users = TTLCache(maxsize=10_000, ttl=MISSING_USER_TTL)
+# (user id, password hash, password digest) triples that passed a password check
+_valid_logins = TTLCache(maxsize=10_000, ttl=60)
+_login_cache_lock = threading.Lock()
+# Per-process key so cached password digests can't be matched offline
+_password_digest_key = os.urandom(32)
+
+@lru_cache(maxsize=1)
+def _dummy_password_hash():
+    """Hash of a random password, built on first use"""
+    return hash_password(secrets.token_hex(16))
+
+def _burn_password_check(password):
+    """Spend as long as a real password check so unknown users can't be told apart"""
+    verify_password(_dummy_password_hash(), password)
+
+def _password_digest(password):
+    """Keyed digest of a password, safe to keep in memory"""
+    return hashlib.blake2b(password.encode(), key=_password_digest_key, digest_size=16).digest()
+
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
 def validate_email(email):
     """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return _EMAIL_RE.match(email) is not None
 
 @app.route("/api/auth/register", methods=["POST"])
 def register():
@@ -127,40 +341,42 @@ def register():
             return jsonify({"error": "Invalid email format"}), 400
 
         db = SessionLocal()
-        try:
-            # Check if username already exists
-            if db.query(User).filter(User.username == username).first():
-                return jsonify({"error": "Username already exists"}), 400
-
-            # Check if email already exists
-            if db.query(User).filter(User.email == email).first():
-                return jsonify({"error": "Email already registered"}), 400
-
-            # Create new user
-            new_user = User(
-                username=username,
-                email=email
-            )
-            new_user.set_password(password)
-            db.add(new_user)
-            db.commit()
-            db.refresh(new_user)
-
-            # Generate token
-            token = generate_token(
-                new_user.id,
-                new_user.username,
-                new_user.email,
-                new_user.is_admin
-            )
-
-            return jsonify({
-                "message": "User registered successfully",
-                "token": token,
-                "user": new_user.to_dict()
-            }), 201
-        finally:
-            db.close()
+        # Check if username already exists
+        if db.query(User).filter(User.username == username).first():
+            return jsonify({"error": "Username already exists"}), 400
+
+        # Check if email already exists
+        if db.query(User).filter(User.email == email).first():
+            return jsonify({"error": "Email already registered"}), 400
+
+        # Create new user
+        new_user = User(
+            username=username,
+            email=email
+        )
+        new_user.set_password(password)
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+
+        # Earlier failed logins may have cached this name as unknown
+        with _login_cache_lock:
+            _missing_users.pop(username, None)
+            _missing_users.pop(email, None)
+
+        # Generate token
+        token = generate_token(
+            new_user.id,
+            new_user.username,
+            new_user.email,
+            new_user.is_admin
+        )
+
+        return jsonify({
+            "message": "User registered successfully",
+            "token": token,
+            "user": new_user.to_dict()
+        }), 201
     except Exception as e:
         return jsonify({"error": f"Registration failed: {str(e)}"}), 500
 
@@ -175,31 +391,53 @@ def login():
         if not username or not password:
             return jsonify({"error": "Username and password are required"}), 400
 
+        with _login_cache_lock:
+            known_missing = username in _missing_users
+        if known_missing:
+            _burn_password_check(password)
+            return jsonify({"error": "Invalid username or password"}), 401
+
         db = SessionLocal()
-        try:
-            # Find user by username or email
-            user = db.query(User).filter(
-                (User.username == username) | (User.email == username)
-            ).first()
+        # Find user by username or email (separate lookups so each uses its index)
+        user = (
+            db.query(User).filter(User.username == username).first()
+            or db.query(User).filter(User.email == username).first()
+        )
 
-            if not user or not user.check_password(password):
+        if not user:
+            with _login_cache_lock:
+                _missing_users[username] = True
+            _burn_password_check(password)
+            return jsonify({"error": "Invalid username or password"}), 401
+
+        # The stored hash is part of the key, so a password change invalidates it
+        login_key = (user.id, user.password_hash, _password_digest(password))
+        with _login_cache_lock:
+            recently_verified = login_key in _valid_logins
+        if not recently_verified:
+            if not user.check_password(password):
                 return jsonify({"error": "Invalid username or password"}), 401
+            if user.password_needs_rehash():
+                # Upgrade legacy pbkdf2 hashes now that the plain password is known
+                user.set_password(password)
+                db.commit()
+                login_key = (user.id, user.password_hash, _password_digest(password))
+            with _login_cache_lock:
+                _valid_logins[login_key] = True
+
+        # Generate token
+        token = generate_token(
+            user.id,
+            user.username,
+            user.email,
+            user.is_admin
+        )
 
-            # Generate token
-            token = generate_token(
-                user.id,
-                user.username,
-                user.email,
-                user.is_admin
-            )
-
-            return jsonify({
-                "message": "Login successful",
-                "token": token,
-                "user": user.to_dict()
-            }), 200
-        finally:
-            db.close()
+        return jsonify({
+            "message": "Login successful",
+            "token": token,
+            "user": user.to_dict()
+        }), 200
     except Exception as e:
         return jsonify({"error": f"Login failed: {str(e)}"}), 500
 
@@ -207,14 +445,17 @@ def login():
 @require_auth
 def get_current_user(current_user):
     """Get current authenticated user information"""
+    user_data = get_cached_user(current_user["user_id"])
+    if user_data is not None:
+        return jsonify({"user": user_data}), 200
+
     db = SessionLocal()
-    try:
-        user = db.query(User).filter(User.id == current_user["user_id"]).first()
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-        return jsonify({"user": user.to_dict()}), 200
-    finally:
-        db.close()
+    user = db.get(User, current_user["user_id"])
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+    user_data = user.to_dict()
+    cache_user(user.id, user_data)
+    return jsonify({"user": user_data}), 200
 
 @app.route("/api/auth/logout", methods=["POST"])
 def logout():
@@ -237,22 +478,20 @@ def change_password(current_user):
             return jsonify({"error": "New password must be at least 6 characters long"}), 400
 
         db = SessionLocal()
-        try:
-            user = db.query(User).filter(User.id == current_user["user_id"]).first()
-            if not user:
-                return jsonify({"error": "User not found"}), 404
+        user = db.get(User, current_user["user_id"])
+        if not user:
+            return jsonify({"error": "User not found"}), 404
 
-            # Verify old password
-            if not user.check_password(old_password):
-                return jsonify({"error": "Current password is incorrect"}), 401
+        # Verify old password
+        if not user.check_password(old_password):
+            return jsonify({"error": "Current password is incorrect"}), 401
 
-            # Update password
-            user.set_password(new_password)
-            db.commit()
+        # Update password
+        user.set_password(new_password)
+        db.commit()
+        invalidate_user(user.id)
 
-            return jsonify({"message": "Password changed successfully"}), 200
-        finally:
-            db.close()
+        return jsonify({"message": "Password changed successfully"}), 200
     except Exception as e:
         return jsonify({"error": f"Password change failed: {str(e)}"}), 500
 
@@ -370,9 +609,32 @@ def scan_sms():
 # -----------------------------
 # DASHBOARD STATS API
 # -----------------------------
-@app.route("/dashboard/stats", methods=["GET"])
-def dashboard_stats():
-    """Get dashboard statistics"""
+def get_scan_totals():
+    """Sum the scan counters into per-type totals by verdict"""
+    totals = {
+        scan_type: {"total": 0, "safe": 0, "suspicious": 0, "phishing": 0}
+        for scan_type in scan_stats
+    }
+    db = SessionLocal()
+    rows = (
+        db.query(ScanCounter.scan_type, ScanCounter.verdict, func.sum(ScanCounter.count))
+        .group_by(ScanCounter.scan_type, ScanCounter.verdict)
+        .all()
+    )
+    for scan_type, verdict, count in rows:
+        if scan_type in totals and verdict in totals[scan_type]:
+            totals[scan_type][verdict] += count
+            totals[scan_type]["total"] += count
+    return totals
+
+DASHBOARD_CACHE_TTL = 2  # seconds a computed dashboard response is reused
+
+# Serialized /dashboard/stats body and when it was built
+_dashboard_snapshot = {"ts": 0, "body": None}
+_dashboard_lock = threading.Lock()
+
+def build_dashboard_stats():
+    """Compute the dashboard statistics"""
     def calculate_safe_percent(stats):
         total = stats["total"]
         if total == 0:
@@ -394,8 +656,13 @@ def dashboard_stats():
     
     # Get latest incidents from all types
     all_latest = []
+    with _stats_lock:
+        latest_by_type = {
+            scan_type: list(islice(scan_stats[scan_type]["latest"], 3))
+            for scan_type in ["email", "sms", "url"]
+        }
     for scan_type in ["email", "sms", "url"]:
-        all_latest.extend(scan_stats[scan_type]["latest"][:3])
+        all_latest.extend(latest_by_type[scan_type])
     
     # Sort by timestamp (most recent first)
     all_latest.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
@@ -416,99 +683,184 @@ def dashboard_stats():
             "summary": item.get("summary", "") + f" — {status}"
         })
     
-    email_risk, email_color = get_risk_level(scan_stats["email"])
-    sms_risk, sms_color = get_risk_level(scan_stats["sms"])
-    url_risk, url_color = get_risk_level(scan_stats["url"])
+    totals = get_scan_totals()
+    email_risk, email_color = get_risk_level(totals["email"])
+    sms_risk, sms_color = get_risk_level(totals["sms"])
+    url_risk, url_color = get_risk_level(totals["url"])
     
-    return jsonify({
+    return {
         "email": {
-            "safe_percent": calculate_safe_percent(scan_stats["email"]),
-            "total": scan_stats["email"]["total"],
+            "safe_percent": calculate_safe_percent(totals["email"]),
+            "total": totals["email"]["total"],
             "risk": email_risk,
             "risk_color": email_color,
-            "latest": scan_stats["email"]["latest"][0].get("summary", "No scans yet") if scan_stats["email"]["latest"] else "No scans yet"
+            "latest": latest_by_type["email"][0].get("summary", "No scans yet") if latest_by_type["email"] else "No scans yet"
         },
         "sms": {
-            "safe_percent": calculate_safe_percent(scan_stats["sms"]),
-            "total": scan_stats["sms"]["total"],
+            "safe_percent": calculate_safe_percent(totals["sms"]),
+            "total": totals["sms"]["total"],
             "risk": sms_risk,
             "risk_color": sms_color,
-            "latest": scan_stats["sms"]["latest"][0].get("summary", "No scans yet") if scan_stats["sms"]["latest"] else "No scans yet"
+            "latest": latest_by_type["sms"][0].get("summary", "No scans yet") if latest_by_type["sms"] else "No scans yet"
         },
         "url": {
-            "safe_percent": calculate_safe_percent(scan_stats["url"]),
-            "total": scan_stats["url"]["total"],
+            "safe_percent": calculate_safe_percent(totals["url"]),
+            "total": totals["url"]["total"],
             "risk": url_risk,
             "risk_color": url_color,
-            "latest": scan_stats["url"]["latest"][0].get("summary", "No scans yet") if scan_stats["url"]["latest"] else "No scans yet"
+            "latest": latest_by_type["url"][0].get("summary", "No scans yet") if latest_by_type["url"] else "No scans yet"
         },
         "latest": formatted_latest
-    })
+    }
+
+@app.route("/dashboard/stats", methods=["GET"])
+def dashboard_stats():
+    """Get dashboard statistics"""
+    with _dashboard_lock:
+        if _dashboard_snapshot["body"] is None or time.time() - _dashboard_snapshot["ts"] > DASHBOARD_CACHE_TTL:
+            _dashboard_snapshot["body"] = orjson.dumps(build_dashboard_stats())
+            _dashboard_snapshot["ts"] = time.time()
+        body = _dashboard_snapshot["body"]
+    return app.response_class(body, mimetype="application/json")
 
 # -----------------------------
 # REPORTS API
 # -----------------------------
-@app.route("/api/reports", methods=["GET"])
-def get_reports():
-    """Fetch reports with filtering"""
-    filter_input = request.args.get("filter", "").strip()
-    
+REPORTS_CACHE_TTL = 10  # seconds before the default report is refreshed in the background
+
+# Default (last 7 days) report, served stale while a refresh runs
+_reports_cache = {"data": None, "ts": 0, "refreshing": False}
+_reports_lock = threading.Lock()
+_reports_executor = ThreadPoolExecutor(max_workers=1)
+# Filtered reports, keyed by the filter string
+_filtered_reports_cache = TTLCache(maxsize=256, ttl=30)
+
+REPORTS_BATCH_SIZE = 500  # ScanLog rows loaded per round trip
+
+def _iter_reports(filter_input):
+    """Run the reports query for a filter and yield serialized rows"""
     db = SessionLocal()
-    try:
-        query = db.query(ScanLog)
-        
-        if filter_input:
-            # Check for range "YYYY-MM-DD - YYYY-MM-DD"
-            if " - " in filter_input:
-                parts = filter_input.split(" - ")
-                if len(parts) == 2:
-                    try:
-                        start_date = datetime.strptime(parts[0].strip(), "%Y-%m-%d")
-                        end_date = datetime.strptime(parts[1].strip(), "%Y-%m-%d") + timedelta(days=1)
-                        query = query.filter(ScanLog.created_at >= start_date, ScanLog.created_at < end_date)
-                    except ValueError:
-                        pass
-            else:
-                # Single date YYYY-MM-DD
+    query = db.query(ScanLog)
+    
+    if filter_input:
+        # Check for range "YYYY-MM-DD - YYYY-MM-DD"
+        if " - " in filter_input:
+            parts = filter_input.split(" - ")
+            if len(parts) == 2:
                 try:
-                    target_date = datetime.strptime(filter_input, "%Y-%m-%d")
-                    next_day = target_date + timedelta(days=1)
-                    query = query.filter(ScanLog.created_at >= target_date, ScanLog.created_at < next_day)
+                    start_date = datetime.strptime(parts[0].strip(), "%Y-%m-%d")
+                    end_date = datetime.strptime(parts[1].strip(), "%Y-%m-%d") + timedelta(days=1)
+                    query = query.filter(ScanLog.created_at >= start_date, ScanLog.created_at < end_date)
                 except ValueError:
-                    # Not a date, maybe search in input_value or scan_type
-                    query = query.filter(
-                        (ScanLog.input_value.ilike(f"%{filter_input}%")) | 
-                        (ScanLog.scan_type.ilike(f"%{filter_input}%"))
-                    )
+                    pass
         else:
-            # Default: Last 7 days
-            week_ago = datetime.utcnow() - timedelta(days=7)
-            query = query.filter(ScanLog.created_at >= week_ago)
-
-        logs = query.order_by(ScanLog.created_at.desc()).all()
-        
-        results = []
-        import json
-        for log in logs:
+            # Single date YYYY-MM-DD
             try:
-                data = json.loads(log.result)
-            except:
-                data = {"verdict": "unknown", "summary": "No data"}
-                
-            results.append({
-                "id": log.id,
-                "type": log.scan_type,
-                "input": log.input_value,
-                "verdict": data.get("verdict", "unknown"),
-                "summary": data.get("summary", ""),
-                "date": log.created_at.strftime("%Y-%m-%d"),
-                "timestamp": log.created_at.isoformat(),
-                "details": data.get("details", {})
-            })
+                target_date = datetime.strptime(filter_input, "%Y-%m-%d")
+                next_day = target_date + timedelta(days=1)
+                query = query.filter(ScanLog.created_at >= target_date, ScanLog.created_at < next_day)
+            except ValueError:
+                # Not a date, maybe search in input_value or scan_type
+                query = query.filter(
+                    (ScanLog.input_value.ilike(f"%{filter_input}%")) | 
+                    (ScanLog.scan_type.ilike(f"%{filter_input}%"))
+                )
+    else:
+        # Default: Last 7 days
+        week_ago = datetime.utcnow() - timedelta(days=7)
+        query = query.filter(ScanLog.created_at >= week_ago)
+
+    logs = query.order_by(ScanLog.created_at.desc()).yield_per(REPORTS_BATCH_SIZE)
+    
+    for log in logs:
+        try:
+            data = orjson.loads(log.result)
+        except:
+            data = {"verdict": "unknown", "summary": "No data"}
+
+        if log.verdict is not None:
+            verdict, summary, details = log.verdict, log.summary or "", data
+        else:
+            # Rows written before verdict/summary had their own columns
+            verdict = data.get("verdict", "unknown")
+            summary = data.get("summary", "")
+            details = data.get("details", {})
             
-        return jsonify(results)
+        yield {
+            "id": log.id,
+            "type": log.scan_type,
+            "input": log.input_value,
+            "verdict": verdict,
+            "summary": summary,
+            "date": log.created_at.strftime("%Y-%m-%d"),
+            "timestamp": log.created_at.isoformat(),
+            "details": details
+        }
+
+def _query_reports(filter_input):
+    """Run the reports query for a filter and return the serialized rows"""
+    return list(_iter_reports(filter_input))
+
+def _stream_reports(filter_input):
+    """Yield the reports for a filter as a JSON array, one row at a time"""
+    yield b"["
+    for i, row in enumerate(_iter_reports(filter_input)):
+        yield b"," + orjson.dumps(row) if i else orjson.dumps(row)
+    yield b"]"
+
+def _refresh_default_reports():
+    """Re-run the default report query and swap it into the cache"""
+    try:
+        data = _query_reports("")
+        with _reports_lock:
+            _reports_cache["data"] = data
+            _reports_cache["ts"] = time.time()
+    except Exception:
+        app.logger.exception("Error refreshing reports")
     finally:
-        db.close()
+        with _reports_lock:
+            _reports_cache["refreshing"] = False
+        SessionLocal.remove()
+
+def _default_reports():
+    """Return the cached default report, scheduling a refresh when it is stale"""
+    refresh = False
+    with _reports_lock:
+        data = _reports_cache["data"]
+        stale = time.time() - _reports_cache["ts"] >= REPORTS_CACHE_TTL
+        if data is not None and stale and not _reports_cache["refreshing"]:
+            _reports_cache["refreshing"] = True
+            refresh = True
+
+    if data is None:
+        # Nothing cached yet, so this request has to wait for the query
+        data = _query_reports("")
+        with _reports_lock:
+            _reports_cache["data"] = data
+            _reports_cache["ts"] = time.time()
+    elif refresh:
+        _reports_executor.submit(_refresh_default_reports)
+    return data
+
+@app.route("/api/reports", methods=["GET"])
+def get_reports():
+    """Fetch reports with filtering"""
+    filter_input = request.args.get("filter", "").strip()
+
+    if not filter_input:
+        return json_response(_default_reports())
+
+    # Date ranges can span any number of rows, so they are streamed, not cached
+    if " - " in filter_input:
+        return Response(stream_with_context(_stream_reports(filter_input)), mimetype="application/json")
+
+    with _reports_lock:
+        results = _filtered_reports_cache.get(filter_input)
+    if results is None:
+        results = _query_reports(filter_input)
+        with _reports_lock:
+            _filtered_reports_cache[filter_input] = results
+    return json_response(results)
 
 # -----------------------------
 # PIE CHART STATS API
@@ -516,7 +868,11 @@ def get_reports():
 @app.route("/stats/pie", methods=["GET"])
 def pie_stats():
     """Get pie chart statistics"""
-    return jsonify(scan_stats["pie"])
+    totals = get_scan_totals()
+    return jsonify({
+        verdict: sum(type_totals[verdict] for type_totals in totals.values())
+        for verdict in ("phishing", "suspicious", "safe")
+    })
 
 
 # -----------------------------
@@ -528,8 +884,8 @@ def bar_stats():
     department = request.args.get("department", "all").lower()
     period = request.args.get("period", "daily").lower()
     
-    # Calculate date range based on period
-    today = datetime.now().date()
+    # Calculate date range based on period (UTC, matching ScanLog.created_at)
+    today = datetime.utcnow().date()
     date_ranges = {
         "daily": 7,      # Last 7 days
         "weekly": 4,     # Last 4 weeks
@@ -540,87 +896,69 @@ def bar_stats():
     
     days_back = date_ranges.get(period, 7)
     
-    # Generate date list based on period
+    # Generate date list based on period; each point sums one bucket of counts
     data_points = []
+    start_date = today
     if period == "daily":
         # Daily data for last 7 days
         for i in range(days_back - 1, -1, -1):
             date = today - timedelta(days=i)
-            date_str = date.isoformat()
             data_points.append({
-                "date": date_str,
+                "bucket": date.isoformat(),
                 "label": date.strftime("%a"),  # Mon, Tue, etc.
                 "full_label": date.strftime("%b %d")  # Jan 15
             })
+        start_date = today - timedelta(days=days_back - 1)
+        bucket_of = lambda day: day.isoformat()
     elif period == "weekly":
-        # Weekly data for last 4 weeks
+        # Weekly data for last 4 weeks; week i covers the 7 days starting i weeks ago
         for i in range(days_back - 1, -1, -1):
             week_start = today - timedelta(days=i * 7)
             week_end = week_start + timedelta(days=6)
             data_points.append({
-                "date": week_start.isoformat(),
+                "bucket": i,
                 "label": f"W{i+1}",
                 "full_label": f"{week_start.strftime('%b %d')} - {week_end.strftime('%b %d')}"
             })
+        start_date = today - timedelta(days=(days_back - 1) * 7)
+        bucket_of = lambda day: ((today - day).days + 6) // 7
     elif period in ["monthly", "3months", "6months"]:
         # Monthly data
         for i in range(days_back - 1, -1, -1):
             month_date = today - timedelta(days=i * 30)
             data_points.append({
-                "date": month_date.isoformat(),
+                "bucket": month_date.strftime("%Y-%m"),
                 "label": month_date.strftime("%b"),
                 "full_label": month_date.strftime("%B %Y")
             })
+        start_date = (today - timedelta(days=(days_back - 1) * 30)).replace(day=1)
+        bucket_of = lambda day: day.strftime("%Y-%m")
     
     # Aggregate data for each data point
     chart_data = []
     departments_to_include = ["email", "sms", "url"] if department == "all" else [department]
+
+    # Sum the per-day counters for the range straight into the points' buckets
+    bucket_counts = defaultdict(lambda: {"safe": 0, "phishing": 0})
+    if data_points:
+        db = SessionLocal()
+        rows = (
+            db.query(ScanCounter.date, ScanCounter.verdict, ScanCounter.count)
+            .filter(ScanCounter.date >= start_date, ScanCounter.scan_type.in_(departments_to_include))
+            .all()
+        )
+        for day, verdict, count in rows:
+            # Suspicious scans are counted as safe, as before
+            bucket_counts[bucket_of(day)]["phishing" if verdict == "phishing" else "safe"] += count
     
     for point in data_points:
-        date_str = point["date"]
-        safe_total = 0
-        phishing_total = 0
-        
-        if period == "daily":
-            # For daily, just use the specific date
-            for dept in departments_to_include:
-                if date_str in daily_stats and dept in daily_stats[date_str]:
-                    safe_total += daily_stats[date_str][dept]["safe"]
-                    phishing_total += daily_stats[date_str][dept]["phishing"]
-        elif period == "weekly":
-            # For weekly, sum all days in that week
-            week_start = datetime.fromisoformat(date_str).date()
-            for i in range(7):
-                day_date = week_start + timedelta(days=i)
-                day_str = day_date.isoformat()
-                for dept in departments_to_include:
-                    if day_str in daily_stats and dept in daily_stats[day_str]:
-                        safe_total += daily_stats[day_str][dept]["safe"]
-                        phishing_total += daily_stats[day_str][dept]["phishing"]
-        elif period in ["monthly", "3months", "6months"]:
-            # For monthly, sum all days in that month
-            month_start = datetime.fromisoformat(date_str).date()
-            # Get first and last day of month
-            if month_start.month == 12:
-                month_end = month_start.replace(year=month_start.year + 1, month=1, day=1) - timedelta(days=1)
-            else:
-                month_end = month_start.replace(month=month_start.month + 1, day=1) - timedelta(days=1)
-            
-            current_date = month_start
-            while current_date <= month_end:
-                day_str = current_date.isoformat()
-                for dept in departments_to_include:
-                    if day_str in daily_stats and dept in daily_stats[day_str]:
-                        safe_total += daily_stats[day_str][dept]["safe"]
-                        phishing_total += daily_stats[day_str][dept]["phishing"]
-                current_date += timedelta(days=1)
-        
+        counts = bucket_counts.get(point["bucket"], {"safe": 0, "phishing": 0})
         chart_data.append({
             "label": point["label"],
             "full_label": point["full_label"],
-            "safe": safe_total,
-            "phishing": phishing_total,
-            "total": safe_total + phishing_total
+            "safe": counts["safe"],
+            "phishing": counts["phishing"],
+            "total": counts["safe"] + counts["phishing"]
         })
     
     return jsonify({
@@ -633,17 +971,25 @@ def bar_stats():
 # -----------------------------
 # FRONTEND SERVING
 # -----------------------------
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend")
+# Content-hashed names (e.g. app.3f2a9c1d.js) change with every build, so they can
+# be cached for a year; anything else must pair with the current HTML after a deploy
+_FINGERPRINTED_RE = re.compile(r"\.[0-9a-f]{8,}\.\w+$")
+FINGERPRINTED_MAX_AGE = 31536000
+
 @app.route("/", methods=["GET"])
 def index():
     """Serve dashboard as homepage"""
-    frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend")
-    return send_from_directory(frontend_path, "dashboard.html")
+    return send_from_directory(FRONTEND_DIR, "dashboard.html", max_age=0)
 
 @app.route("/<path:filename>")
 def serve_frontend(filename):
-    """Serve frontend files"""
-    frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend")
-    return send_from_directory(frontend_path, filename)
+    """Serve frontend files; only fingerprinted assets skip revalidation"""
+    if not _FINGERPRINTED_RE.search(filename):
+        return send_from_directory(FRONTEND_DIR, filename, max_age=0)
+    response = send_from_directory(FRONTEND_DIR, filename, max_age=FINGERPRINTED_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
 
 
 # -----------------------------
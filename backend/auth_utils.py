@@ -1,12 +1,22 @@
 """
 Authentication utilities for JWT token generation and validation
 """
+import hashlib
+import threading
+import time
 import jwt
+from cachetools import TTLCache
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify
 from .config import SECRET_KEY, JWT_ALGORITHM, JWT_EXPIRATION_HOURS
 
+# Decoded token payloads, keyed by a digest of the token (raw tokens are not kept)
+_token_cache = TTLCache(maxsize=10_000, ttl=60)
+# Serialized user rows for /api/auth/me, keyed by user id
+_user_cache = TTLCache(maxsize=10_000, ttl=30)
+_cache_lock = threading.Lock()
+
 def generate_token(user_id, username, email, is_admin=False):
     """Generate a JWT token for a user"""
     payload = {
@@ -20,16 +30,49 @@ def generate_token(user_id, username, email, is_admin=False):
     token = jwt.encode(payload, SECRET_KEY, algorithm=JWT_ALGORITHM)
     return token
 
+def _token_key(token):
+    """Cache key for a token"""
+    if isinstance(token, str):
+        token = token.encode()
+    return hashlib.blake2b(token, digest_size=16).digest()
+
 def verify_token(token):
-    """Verify and decode a JWT token"""
+    """Verify and decode a JWT token (valid tokens are cached briefly)"""
+    key = _token_key(token)
+    with _cache_lock:
+        payload = _token_cache.get(key)
+    if payload is not None:
+        # Cache entries can outlive the token itself
+        if payload.get("exp", 0) > time.time():
+            return payload
+        return None
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
 
+    with _cache_lock:
+        _token_cache[key] = payload
+    return payload
+
+def get_cached_user(user_id):
+    """Return the cached user dict for user_id, or None"""
+    with _cache_lock:
+        return _user_cache.get(user_id)
+
+def cache_user(user_id, user_data):
+    """Cache a user dict for user_id"""
+    with _cache_lock:
+        _user_cache[user_id] = user_data
+
+def invalidate_user(user_id):
+    """Drop user_id from the user cache"""
+    with _cache_lock:
+        _user_cache.pop(user_id, None)
+
 def get_current_user_from_token():
     """Extract current user from Authorization header token"""
     auth_header = request.headers.get("Authorization")
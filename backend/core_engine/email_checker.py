@@ -1,21 +1,30 @@
 # backend/core_engine/email_checker.py
 import re
-import json
 import os
-from urllib.parse import urlparse
-from typing import Dict, List, Optional
-import tldextract
-
-# Load rules from JSON file
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Union
+from .utils import build_keyword_finder, build_phrase_matcher, copy_result, extract_root, file_mtime, read_json, results_to_columns, url_host
+
+try:
+    from rapidfuzz.distance import Levenshtein
+except ImportError:  # optional C++ extension; levenshtein_distance falls back to pure Python
+    Levenshtein = None
+
+EMAIL_RULES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    "..", "..", "rules", "email_rules.json"
+)
+
+# Load rules from JSON file (re-read only when the file's mtime changes)
 def load_email_rules() -> dict:
     """Load email rules from JSON file"""
-    rules_path = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-        "..", "..", "rules", "email_rules.json"
-    )
+    return _read_email_rules(EMAIL_RULES_PATH, file_mtime(EMAIL_RULES_PATH))
+
+@lru_cache(maxsize=4)
+def _read_email_rules(rules_path: str, mtime: Optional[float]) -> dict:
     try:
-        with open(rules_path, 'r') as f:
-            return json.load(f)
+        return read_json(rules_path)
     except FileNotFoundError:
         # Fallback to default rules
         return {
@@ -42,20 +51,82 @@ WEIGHTS = {
     "typosquatting": 55,  # High score to immediately flag as phishing
 }
 
+# Regexes compiled once at import
+_URL_RE = re.compile(r'https?://[^\s<>"{}|\\^`\[\]]+', re.IGNORECASE)
+_SUSPICIOUS_PATTERNS = (
+    re.compile(r'[0-9]'),  # Numbers in words
+    re.compile(r'[il1|]{3}'),  # Repeated i/l/1/| (matched against lower-cased text)
+)
+
 # Trusted brands to protect against typosquatting
 TRUSTED_BRANDS = ["google", "support", "noreply", "github", "opay", "the5ers"]
+_BRAND_SET = frozenset(TRUSTED_BRANDS)
+
+# Edit distance <= 2 needs lengths within 2, so each SLD length maps to the
+# brands worth comparing against (kept in TRUSTED_BRANDS order)
+_BRANDS_NEAR_LEN = {
+    n: tuple(b for b in TRUSTED_BRANDS if abs(len(b) - n) <= 2)
+    for n in range(max(map(len, TRUSTED_BRANDS)) + 3)
+}
+
+def _bigrams(s: str) -> frozenset:
+    return frozenset(s[i:i + 2] for i in range(len(s) - 1))
+
+# An edit destroys at most two bigrams, so a string within distance 2 of a brand
+# keeps all but at most 4 of the brand's distinct bigrams
+_BRAND_BIGRAMS = {b: _bigrams(b) for b in TRUSTED_BRANDS}
+_MAX_LOST_BIGRAMS = 4
+
+_PROMO_KEYWORDS = ("won", "reward", "free", "congratulations", "gift", "prize", "bonus", "lottery")
+_find_promo_keywords = build_keyword_finder(_PROMO_KEYWORDS)
+
+@dataclass(frozen=True)
+class EmailRules:
+    """email_rules.json with its phrase lists lower-cased and matchers pre-built"""
+    urgent_phrases: tuple
+    info_request_phrases: tuple
+    dangerous_attachments: tuple
+    suspicious_sender_domains: frozenset
+    link_mismatch_detection: bool
+    match_phrases: Callable[[str], Dict[str, List[str]]]
+
+def get_email_rules() -> EmailRules:
+    """Compiled email rules; rebuilt automatically when email_rules.json changes"""
+    return _compile_email_rules(EMAIL_RULES_PATH, file_mtime(EMAIL_RULES_PATH))
+
+@lru_cache(maxsize=4)
+def _compile_email_rules(rules_path: str, mtime: Optional[float]) -> EmailRules:
+    rules = _read_email_rules(rules_path, mtime)
+    urgent = tuple(p.lower() for p in rules.get("urgent_phrases", []))
+    info = tuple(p.lower() for p in rules.get("info_request_phrases", []))
+    dangerous_ext = tuple(e.lower() for e in rules.get("dangerous_attachments", []))
+    return EmailRules(
+        urgent_phrases=urgent,
+        info_request_phrases=info,
+        dangerous_attachments=dangerous_ext,
+        suspicious_sender_domains=frozenset(rules.get("suspicious_sender_domains", [])),
+        link_mismatch_detection=rules.get("link_mismatch_detection", True),
+        # One scan of the message body covers every phrase list
+        match_phrases=build_phrase_matcher({
+            "urgent": urgent,
+            "info": info,
+            "attachment_ext": dangerous_ext,
+        }),
+    )
 
 # --- Helper functions ---
 def extract_domain_from_email(email: str) -> str:
     """Extract domain from email address"""
-    if not email or "@" not in email:
+    if not email:
+        return ""
+    _, at, domain = email.rpartition("@")
+    if not at:
         return ""
-    return email.split("@")[-1].lower().strip()
+    return domain.lower().strip()
 
 def extract_links(text: str) -> List[str]:
     """Extract all URLs from text"""
-    url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-    return re.findall(url_pattern, text, re.IGNORECASE)
+    return _URL_RE.findall(text)
 
 def check_domain_similarity(domain1: str, domain2: str) -> bool:
     """Check if two domains are similar (basic check)"""
@@ -66,44 +137,76 @@ def check_domain_similarity(domain1: str, domain2: str) -> bool:
     d2 = domain2.replace("www.", "").lower()
     return d1 == d2
 
-def count_spelling_errors(text: str) -> int:
+def count_spelling_errors(text: str, text_lower: Optional[str] = None) -> int:
     """Simple heuristic to detect potential spelling errors"""
     # Look for repeated characters (e.g., "googIe" instead of "google")
     # Look for suspicious character substitutions
-    suspicious_patterns = [
-        r'[0-9]',  # Numbers in words
-        r'[il1|][il1|][il1|]',  # Repeated i/l/1/|
-    ]
+    if text_lower is None:
+        text_lower = text.lower()
     count = 0
-    for pattern in suspicious_patterns:
-        count += len(re.findall(pattern, text, re.IGNORECASE))
+    for pattern in _SUSPICIOUS_PATTERNS:
+        count += len(pattern.findall(text_lower))
     return count
 
-def is_generic_greeting(text: str) -> bool:
+_GENERIC_GREETINGS = ("dear user", "dear customer", "dear sir/madam", "hello", "hi there")
+
+def is_generic_greeting(text: str, text_lower: Optional[str] = None) -> bool:
     """Check if email uses generic greeting"""
-    generic_greetings = ["dear user", "dear customer", "dear sir/madam", "hello", "hi there"]
-    text_lower = text.lower()
-    return any(greeting in text_lower[:100] for greeting in generic_greetings)
+    if text_lower is None:
+        text_lower = text.lower()
+    opening = text_lower[:100]
+    return any(greeting in opening for greeting in _GENERIC_GREETINGS)
 
-def levenshtein_distance(s1: str, s2: str) -> int:
-    """Calculate the Levenshtein edit distance between two strings"""
+def levenshtein_distance(s1: str, s2: str, score_cutoff: Optional[int] = None) -> int:
+    """
+    Calculate the Levenshtein edit distance between two strings.
+    Distances above score_cutoff are reported as score_cutoff + 1, which lets
+    rapidfuzz's bit-parallel implementation stop early.
+    """
+    if Levenshtein is not None:
+        return Levenshtein.distance(s1, s2, score_cutoff=score_cutoff)
+    if score_cutoff is not None and abs(len(s1) - len(s2)) > score_cutoff:
+        return score_cutoff + 1
+    dist = _levenshtein_py(s1, s2)
+    if score_cutoff is not None and dist > score_cutoff:
+        return score_cutoff + 1
+    return dist
+
+def _levenshtein_py(s1: str, s2: str) -> int:
+    """
+    Bit-parallel (Myers/Hyyro) edit distance, used when rapidfuzz is not installed.
+    Each DP column is held in Python int bit-vectors, so every character of the
+    longer string costs a few integer operations instead of a row of cells.
+    """
     if len(s1) < len(s2):
-        return levenshtein_distance(s2, s1)
-
-    if len(s2) == 0:
+        s1, s2 = s2, s1
+    if not s2:
         return len(s1)
 
-    previous_row = range(len(s2) + 1)
-    for i, c1 in enumerate(s1):
-        current_row = [i + 1]
-        for j, c2 in enumerate(s2):
-            insertions = previous_row[j + 1] + 1
-            deletions = current_row[j] + 1
-            substitutions = previous_row[j] + (c1 != c2)
-            current_row.append(min(insertions, deletions, substitutions))
-        previous_row = current_row
-    
-    return previous_row[-1]
+    # Bit-vectors are indexed by position in the shorter string
+    m = len(s2)
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    peq = {}
+    for i, c in enumerate(s2):
+        peq[c] = peq.get(c, 0) | (1 << i)
+
+    pv, mv, score = mask, 0, m
+    for c in s1:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
 
 # --- Main analysis function ---
 def analyze_email(sender: Optional[str] = None, subject: Optional[str] = None, 
@@ -126,15 +229,17 @@ def analyze_email(sender: Optional[str] = None, subject: Optional[str] = None,
     score = 0.0
     links_found = []
     attachments_found = attachments or []
-
-    # Load rules
-    rules = load_email_rules()
+    rules = get_email_rules()
 
     # Normalize inputs
     sender = (sender or "").strip()
     subject = (subject or "").strip()
     content = (content or "").strip()
-    full_text = f"{subject} {content}".lower()
+    # Lower-cased once; helpers below receive these instead of lowering again
+    sender_lower = sender.lower()
+    subject_lower = subject.lower()
+    content_lower = content.lower()
+    full_text = f"{subject_lower} {content_lower}"
 
     # --- Checks ---
 
@@ -142,23 +247,23 @@ def analyze_email(sender: Optional[str] = None, subject: Optional[str] = None,
     sender_domain = extract_domain_from_email(sender)
     if sender_domain:
         # Extract the Second Level Domain (SLD) e.g., 'google' from 'google.com'
-        extracted = tldextract.extract(sender_domain)
-        sld = extracted.domain.lower()
+        sld, _ = extract_root(sender_domain)
         
-        # Check against trusted brands
-        for brand in TRUSTED_BRANDS:
-            # Exact match: Check if it's the official domain
-            if sld == brand:
-                # Basic check: if brand is the5ers, ensure complete domain match if needed
-                # For now, we assume if the SLD matches exactly, it might be safe-ish, 
-                # but we still run other checks.
-                # However, if it is 'google.com', that's fine. 
-                # If it is 'google.bad-site.com', tldextract handles subdomains separately.
-                # We care about the root domain.
-                pass 
-            else:
-                # Check for typosquatting (close distance)
-                dist = levenshtein_distance(sld, brand)
+        # Exact match: the SLD is the official domain, so there is nothing to typosquat.
+        # If it is 'google.com', that's fine.
+        # If it is 'google.bad-site.com', tldextract handles subdomains separately.
+        # We care about the root domain.
+        if sld not in _BRAND_SET:
+            # Check against trusted brands of similar length
+            sld_bigrams = _bigrams(sld)
+            for brand in _BRANDS_NEAR_LEN.get(len(sld), ()):
+                # Cheap bigram-overlap prefilter before the edit distance
+                brand_bigrams = _BRAND_BIGRAMS[brand]
+                if len(sld_bigrams & brand_bigrams) < len(brand_bigrams) - _MAX_LOST_BIGRAMS:
+                    continue
+
+                # Check for typosquatting (close distance); only distances up to 2 matter
+                dist = levenshtein_distance(sld, brand, score_cutoff=2)
                 
                 # Logic: If distance is small (1 or 2) AND it's not the brand itself -> Phishing
                 # We normalize distance relative to length to avoid false positives on short words,
@@ -187,7 +292,9 @@ def analyze_email(sender: Optional[str] = None, subject: Optional[str] = None,
 
     # 0.5) Local-Part Brand Impersonation Check (e.g. googlesecurity@gmail.com)
     # Check if a trusted brand appears in the local part (before @)
-    local_part = sender.split("@")[0].lower() if "@" in sender else ""
+    local_part, at, _ = sender_lower.partition("@")
+    if not at:
+        local_part = ""
     if local_part:
         for brand in TRUSTED_BRANDS:
             # Check if brand is in local part (e.g. "google" in "googlesecurity")
@@ -201,7 +308,7 @@ def analyze_email(sender: Optional[str] = None, subject: Optional[str] = None,
                 # e.g. "support@google.com" -> Safe (captured by earlier logic, but here we check domain mismatch)
                 
                 # Check if the domain is actually the brand's domain
-                sender_sld = tldextract.extract(sender_domain).domain.lower() if sender_domain else ""
+                sender_sld = extract_root(sender_domain)[0] if sender_domain else ""
                 
                 if sender_sld != brand:
                      # e.g. brand="google" found in "googlesecurity", but domain is "gmail" (or "yahoo", etc.)
@@ -210,7 +317,7 @@ def analyze_email(sender: Optional[str] = None, subject: Optional[str] = None,
                      indicators["brand_impersonation_local"] = True
                      break
 
-    suspicious_sender_flag = sender_domain in rules.get("suspicious_sender_domains", [])
+    suspicious_sender_flag = sender_domain in rules.suspicious_sender_domains
     indicators["suspicious_sender_domain"] = suspicious_sender_flag
     if suspicious_sender_flag:
         reasons.append(f"Sender domain '{sender_domain}' is commonly used in phishing")
@@ -225,23 +332,18 @@ def analyze_email(sender: Optional[str] = None, subject: Optional[str] = None,
         score += WEIGHTS["suspicious_link"]
 
         # Check for link domain mismatch
-        if sender_domain and rules.get("link_mismatch_detection", True):
+        # Remove www. for comparison; the sender side is the same for every link
+        if sender_domain and rules.link_mismatch_detection and sender_domain.replace("www.", ""):
+            sender_root = "%s.%s" % extract_root(sender_domain)
             for link in links_found:
                 try:
-                    parsed_url = urlparse(link)
-                    link_domain = parsed_url.netloc.lower()
-                    # Remove www. for comparison
+                    link_domain = url_host(link)
                     link_domain_clean = link_domain.replace("www.", "")
-                    sender_domain_clean = sender_domain.replace("www.", "")
-                    
-                    if link_domain_clean and sender_domain_clean:
+
+                    if link_domain_clean:
                         # Extract root domain using tldextract
-                        link_extracted = tldextract.extract(link_domain)
-                        sender_extracted = tldextract.extract(sender_domain)
-                        
-                        link_root = f"{link_extracted.domain}.{link_extracted.suffix}".lower()
-                        sender_root = f"{sender_extracted.domain}.{sender_extracted.suffix}".lower()
-                        
+                        link_root = "%s.%s" % extract_root(link_domain)
+
                         if link_root != sender_root and link_root:
                             indicators["link_domain_mismatch"] = True
                             reasons.append(f"Link domain '{link_root}' doesn't match sender domain '{sender_root}'")
@@ -250,12 +352,10 @@ def analyze_email(sender: Optional[str] = None, subject: Optional[str] = None,
                 except Exception:
                     pass
 
+    hits = rules.match_phrases(full_text)
+
     # 3) Urgent language / fear-based phrases
-    urgent_phrases = rules.get("urgent_phrases", [])
-    urgent_found = []
-    for phrase in urgent_phrases:
-        if phrase.lower() in full_text:
-            urgent_found.append(phrase)
+    urgent_found = hits["urgent"]
     
     indicators["urgent_language"] = len(urgent_found) > 0
     if urgent_found:
@@ -263,11 +363,7 @@ def analyze_email(sender: Optional[str] = None, subject: Optional[str] = None,
         score += WEIGHTS["urgent_language"]
 
     # 4) Information request phrases
-    info_phrases = rules.get("info_request_phrases", [])
-    info_found = []
-    for phrase in info_phrases:
-        if phrase.lower() in full_text:
-            info_found.append(phrase)
+    info_found = hits["info"]
     
     indicators["info_request"] = len(info_found) > 0
     if info_found:
@@ -275,13 +371,7 @@ def analyze_email(sender: Optional[str] = None, subject: Optional[str] = None,
         score += WEIGHTS["info_request"]
 
     # 5) Dangerous attachments
-    dangerous_extensions = rules.get("dangerous_attachments", [])
-    dangerous_attachments = []
-    for att in attachments_found:
-        for ext in dangerous_extensions:
-            if att.lower().endswith(ext.lower()):
-                dangerous_attachments.append(att)
-                break
+    dangerous_attachments = [att for att in attachments_found if att.lower().endswith(rules.dangerous_attachments)]
     
     indicators["dangerous_attachment"] = len(dangerous_attachments) > 0
     if dangerous_attachments:
@@ -289,14 +379,14 @@ def analyze_email(sender: Optional[str] = None, subject: Optional[str] = None,
         score += WEIGHTS["dangerous_attachment"]
     
     # Also check if attachments are mentioned in content
-    if any(ext.lower() in full_text for ext in dangerous_extensions):
+    if hits["attachment_ext"]:
         if not indicators["dangerous_attachment"]:
             reasons.append("Email mentions dangerous file types")
             score += WEIGHTS["dangerous_attachment"] * 0.5
 
     # 6) "Too good to be true" offers
-    promo_keywords = ["won", "reward", "free", "congratulations", "gift", "prize", "bonus", "lottery"]
-    promo_found = [kw for kw in promo_keywords if kw in full_text]
+    promo_hits = _find_promo_keywords(full_text)
+    promo_found = [kw for kw in _PROMO_KEYWORDS if kw in promo_hits]
     indicators["too_good_to_be_true"] = len(promo_found) > 0
     if promo_found:
         reasons.append(f"Suspicious promotional language: {', '.join(promo_found[:3])}")
@@ -304,7 +394,6 @@ def analyze_email(sender: Optional[str] = None, subject: Optional[str] = None,
 
     # 7) Suspicious subject line
     if subject:
-        subject_lower = subject.lower()
         suspicious_subject_indicators = ["urgent", "action required", "verify", "suspended", "locked"]
         if any(indicator in subject_lower for indicator in suspicious_subject_indicators):
             indicators["suspicious_subject"] = True
@@ -313,14 +402,14 @@ def analyze_email(sender: Optional[str] = None, subject: Optional[str] = None,
 
     # 8) Spelling errors / typosquatting in sender
     if sender:
-        spelling_errors = count_spelling_errors(sender)
+        spelling_errors = count_spelling_errors(sender, sender_lower)
         indicators["spelling_errors"] = spelling_errors > 0
         if spelling_errors > 0:
             reasons.append("Potential spelling errors or typosquatting in sender address")
             score += WEIGHTS["spelling_errors"]
 
     # 9) Generic greeting
-    if is_generic_greeting(content):
+    if is_generic_greeting(content, content_lower):
         indicators["generic_greeting"] = True
         reasons.append("Uses generic greeting instead of personal name")
         score += WEIGHTS["generic_greeting"]
@@ -350,6 +439,28 @@ def analyze_email(sender: Optional[str] = None, subject: Optional[str] = None,
 
     return result
 
+def analyze_emails_batch(messages: Iterable[dict], columns: bool = False) -> Union[List[dict], Dict[str, list]]:
+    """
+    Analyze many emails (dicts of analyze_email keyword arguments), in order.
+    Identical messages are analyzed once; repeats get their own copy of the result.
+    With columns=True, returns the results_to_columns view instead, and repeats
+    share one result since no caller sees the dicts.
+    """
+    seen = {}
+    results = []
+    for msg in messages:
+        attachments = msg.get("attachments")
+        key = (msg.get("sender"), msg.get("subject"), msg.get("content"),
+               tuple(attachments) if attachments else None)
+        result = seen.get(key)
+        if result is not None:
+            if not columns:
+                result = copy_result(result)
+        else:
+            result = seen[key] = analyze_email(**msg)
+        results.append(result)
+    return results_to_columns(results) if columns else results
+
 # Allow external import
-__all__ = ["analyze_email"]
+__all__ = ["analyze_email", "analyze_emails_batch"]
 
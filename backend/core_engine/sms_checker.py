@@ -1,21 +1,25 @@
 # backend/core_engine/sms_checker.py
 import re
-import json
 import os
-from urllib.parse import urlparse
-from typing import Dict, List, Optional
-import tldextract
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Union
+from .utils import build_keyword_finder, build_phrase_matcher, copy_result, extract_root, file_mtime, read_json, results_to_columns, url_host
 
-# Load rules from JSON file
+SMS_RULES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    "..", "..", "rules", "sms_rules.json"
+)
+
+# Load rules from JSON file (re-read only when the file's mtime changes)
 def load_sms_rules() -> dict:
     """Load SMS rules from JSON file"""
-    rules_path = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-        "..", "..", "rules", "sms_rules.json"
-    )
+    return _read_sms_rules(SMS_RULES_PATH, file_mtime(SMS_RULES_PATH))
+
+@lru_cache(maxsize=4)
+def _read_sms_rules(rules_path: str, mtime: Optional[float]) -> dict:
     try:
-        with open(rules_path, 'r') as f:
-            return json.load(f)
+        return read_json(rules_path)
     except FileNotFoundError:
         # Fallback to default rules
         return {
@@ -46,6 +50,48 @@ def get_weights(rules: dict) -> dict:
         "excessive_caps": 10,
     })
 
+# Single words (and their plural/-ed/-ing forms) are found in one keyword scan;
+# phrases go through the phrase matcher
+_INFO_KEYWORDS = ("otp", "pin", "password")
+_INFO_PHRASES = ("security code", "verification code", "2fa code")
+_PROMO_KEYWORDS = ("won", "reward", "free", "congratulations", "gift", "prize", "bonus", "lottery", "promo")
+_BANK_KEYWORDS = ("bank", "account", "card", "payment", "transaction", "balance")
+_find_keywords = build_keyword_finder(_INFO_KEYWORDS + _PROMO_KEYWORDS + _BANK_KEYWORDS)
+
+# Regexes compiled once at import
+_URL_RE = re.compile(r'https?://[^\s<>"{}|\\^`\[\]]+', re.IGNORECASE)
+_VALID_NUMBER_RE = re.compile(r'^\+?[0-9\s\-\(\)]{7,}$')
+_CONTACT_RE = re.compile(r'(call|contact|reply|stop|unsubscribe)')
+# Deleting the special characters and comparing lengths counts them without a match list
+_DROP_SPECIAL_CHARS = str.maketrans("", "", "!@#$%^&*()_+-=[]{};':\"\\|,.<>?")
+
+@dataclass(frozen=True)
+class SmsRules:
+    """sms_rules.json with weights resolved, phrase lists lower-cased and matchers pre-built"""
+    weights: dict
+    suspicious_numbers: tuple
+    phishing_keywords: tuple
+    match_phrases: Callable[[str], Dict[str, List[str]]]
+
+def get_sms_rules() -> SmsRules:
+    """Compiled SMS rules; rebuilt automatically when sms_rules.json changes"""
+    return _compile_sms_rules(SMS_RULES_PATH, file_mtime(SMS_RULES_PATH))
+
+@lru_cache(maxsize=4)
+def _compile_sms_rules(rules_path: str, mtime: Optional[float]) -> SmsRules:
+    rules = _read_sms_rules(rules_path, mtime)
+    return SmsRules(
+        weights=get_weights(rules),
+        suspicious_numbers=tuple(p.lower() for p in rules.get("suspicious_numbers", [])),
+        phishing_keywords=tuple(rules.get("phishing_keywords", [])),
+        # One scan of the message body covers every phrase list
+        match_phrases=build_phrase_matcher({
+            "urgent": [p.lower() for p in rules.get("urgent_phrases", [])],
+            "unexpected": [p.lower() for p in rules.get("unexpected_action_phrases", [])],
+            "info": _INFO_PHRASES,
+        }),
+    )
+
 # --- Helper functions ---
 def is_suspicious_number(number: str) -> bool:
     """Check if phone number is suspicious"""
@@ -57,33 +103,30 @@ def is_suspicious_number(number: str) -> bool:
 
 def extract_links(text: str) -> List[str]:
     """Extract all URLs from text"""
-    url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-    return re.findall(url_pattern, text, re.IGNORECASE)
+    return _URL_RE.findall(text)
+
+_SHORTENED_DOMAINS = frozenset({
+    "bit.ly", "tinyurl.com", "t.co", "goo.gl", "ow.ly", "is.gd",
+    "short.link", "rebrand.ly", "cutt.ly", "buff.ly", "adf.ly",
+    "tiny.cc", "shorturl.at", "rb.gy", "bit.do", "shorte.st"
+})
 
 def is_shortened_url(url: str) -> bool:
     """Check if URL is a shortened URL service"""
-    shortened_domains = [
-        "bit.ly", "tinyurl.com", "t.co", "goo.gl", "ow.ly", "is.gd",
-        "short.link", "rebrand.ly", "cutt.ly", "buff.ly", "adf.ly",
-        "tiny.cc", "shorturl.at", "rb.gy", "bit.do", "shorte.st"
-    ]
-    try:
-        parsed = urlparse(url)
-        domain = parsed.netloc.lower().replace("www.", "")
-        return any(short_domain in domain for short_domain in shortened_domains)
-    except:
+    host = url_host(url)
+    if not host:
         return False
+    return "%s.%s" % extract_root(host) in _SHORTENED_DOMAINS
 
 def extract_domain_from_link(url: str) -> str:
     """Extract root domain from URL using tldextract"""
     try:
-        parsed = urlparse(url)
-        host = parsed.netloc.lower()
+        host = url_host(url)
         if not host:
             return ""
-        extracted = tldextract.extract(host)
-        if extracted.domain and extracted.suffix:
-            return f"{extracted.domain}.{extracted.suffix}"
+        domain, suffix = extract_root(host)
+        if domain and suffix:
+            return f"{domain}.{suffix}"
         return host
     except:
         return ""
@@ -113,13 +156,19 @@ def check_sender_link_mismatch(sender: str, links: List[str]) -> bool:
     
     return False
 
-def count_phishing_keywords(text: str, keywords: List[str]) -> int:
+@lru_cache(maxsize=32)
+def _keyword_regex(keywords: tuple):
+    """One word-bounded alternation for a keyword list, longest keywords first"""
+    alternation = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+    return re.compile(r'\b(?:' + alternation + r')\b')
+
+def count_phishing_keywords(text: str, keywords: List[str], text_lower: Optional[str] = None) -> int:
     """Count occurrences of phishing keywords"""
-    text_lower = text.lower()
-    count = 0
-    for keyword in keywords:
-        count += len(re.findall(r'\b' + re.escape(keyword) + r'\b', text_lower))
-    return count
+    if not keywords:
+        return 0
+    if text_lower is None:
+        text_lower = text.lower()
+    return len(_keyword_regex(tuple(keywords)).findall(text_lower))
 
 # --- Main analysis function ---
 def analyze_sms(sender: Optional[str] = None, number: Optional[str] = None, 
@@ -142,31 +191,30 @@ def analyze_sms(sender: Optional[str] = None, number: Optional[str] = None,
     score = 0.0
     links_found = []
 
-    # Load rules
-    rules = load_sms_rules()
-    
-    # Load weights from rules JSON (strictly from JSON)
-    WEIGHTS = get_weights(rules)
+    rules = get_sms_rules()
+    WEIGHTS = rules.weights
 
     # Normalize inputs
     sender = (sender or "").strip()
     number = (number or "").strip()
     content = (content or "").strip()
+    # Lower-cased once; helpers below receive these instead of lowering again
     full_text = content.lower()
+    sender_lower = sender.lower()
 
     # --- Checks ---
 
     # 1) Suspicious sender number (from rules JSON)
     if number:
-        suspicious_numbers = rules.get("suspicious_numbers", [])
-        suspicious_number_flag = any(pattern.lower() in number.lower() for pattern in suspicious_numbers) or is_suspicious_number(number)
+        number_lower = number.lower()
+        suspicious_number_flag = any(pattern in number_lower for pattern in rules.suspicious_numbers) or is_suspicious_number(number)
         indicators["suspicious_sender_number"] = suspicious_number_flag
         if suspicious_number_flag:
             reasons.append(f"Suspicious sender number: {number} (from sms_rules.json)")
             score += WEIGHTS["suspicious_sender_number"]
         
         # Check if number looks invalid
-        if number and not re.match(r'^\+?[0-9\s\-\(\)]{7,}$', number):
+        if number and not _VALID_NUMBER_RE.match(number):
             indicators["invalid_number_format"] = True
             reasons.append("Invalid or unusual phone number format")
             score += WEIGHTS["invalid_number_format"]
@@ -180,11 +228,8 @@ def analyze_sms(sender: Optional[str] = None, number: Optional[str] = None,
         score += WEIGHTS["suspicious_link"]
 
         # Check for shortened URLs (high risk in SMS)
-        shortened_found = []
-        for link in links_found:
-            if is_shortened_url(link):
-                shortened_found.append(link)
-        
+        shortened_found = [link for link in links_found if is_shortened_url(link)]
+
         if shortened_found:
             indicators["shortened_url"] = True
             reasons.append(f"Shortened URL(s) detected: {', '.join(shortened_found[:2])}")
@@ -196,12 +241,11 @@ def analyze_sms(sender: Optional[str] = None, number: Optional[str] = None,
             reasons.append("Links in SMS don't match the claimed sender service")
             score += WEIGHTS["link_sender_mismatch"]
 
+    hits = rules.match_phrases(full_text)
+    keyword_hits = _find_keywords(full_text)
+
     # 3) Urgent language / fear-based phrases
-    urgent_phrases = rules.get("urgent_phrases", [])
-    urgent_found = []
-    for phrase in urgent_phrases:
-        if phrase.lower() in full_text:
-            urgent_found.append(phrase)
+    urgent_found = hits["urgent"]
     
     indicators["urgent_language"] = len(urgent_found) > 0
     if urgent_found:
@@ -209,8 +253,7 @@ def analyze_sms(sender: Optional[str] = None, number: Optional[str] = None,
         score += WEIGHTS["urgent_language"]
 
     # 4) Phishing keywords
-    phishing_keywords = rules.get("phishing_keywords", [])
-    keyword_count = count_phishing_keywords(full_text, phishing_keywords)
+    keyword_count = count_phishing_keywords(content, rules.phishing_keywords, full_text)
     indicators["phishing_keywords"] = keyword_count > 0
     
     if keyword_count > 0:
@@ -218,11 +261,7 @@ def analyze_sms(sender: Optional[str] = None, number: Optional[str] = None,
         score += min(WEIGHTS["phishing_keywords"] * (keyword_count / 2), WEIGHTS["phishing_keywords"] * 2)
 
     # 5) Unexpected action phrases (requests for sensitive info)
-    unexpected_phrases = rules.get("unexpected_action_phrases", [])
-    unexpected_found = []
-    for phrase in unexpected_phrases:
-        if phrase.lower() in full_text:
-            unexpected_found.append(phrase)
+    unexpected_found = hits["unexpected"]
     
     indicators["unexpected_action"] = len(unexpected_found) > 0
     if unexpected_found:
@@ -230,32 +269,29 @@ def analyze_sms(sender: Optional[str] = None, number: Optional[str] = None,
         score += WEIGHTS["unexpected_action"]
 
     # 6) Information request (OTP, PIN, password, etc.)
-    info_keywords = ["otp", "pin", "password", "security code", "verification code", "2fa code"]
-    info_found = [kw for kw in info_keywords if kw in full_text]
+    info_found = [kw for kw in _INFO_KEYWORDS if kw in keyword_hits] + hits["info"]
     indicators["info_request"] = len(info_found) > 0
     if info_found:
         reasons.append(f"Requests sensitive information: {', '.join(info_found)}")
         score += WEIGHTS["info_request"]
 
     # 7) "Too good to be true" offers
-    promo_keywords = ["won", "reward", "free", "congratulations", "gift", "prize", "bonus", "lottery", "promo"]
-    promo_found = [kw for kw in promo_keywords if kw in full_text]
+    promo_found = [kw for kw in _PROMO_KEYWORDS if kw in keyword_hits]
     indicators["too_good_to_be_true"] = len(promo_found) > 0
     if promo_found:
         reasons.append(f"Suspicious promotional language: {', '.join(promo_found[:3])}")
         score += WEIGHTS["too_good_to_be_true"]
 
     # 8) Check for bank/financial institution mentions (common in SMS phishing)
-    bank_keywords = ["bank", "account", "card", "payment", "transaction", "balance"]
-    bank_mentions = [kw for kw in bank_keywords if kw in full_text]
-    if bank_mentions and not any(kw in sender.lower() for kw in ["bank", "financial"]):
+    bank_mentions = [kw for kw in _BANK_KEYWORDS if kw in keyword_hits]
+    if bank_mentions and not any(kw in sender_lower for kw in ["bank", "financial"]):
         indicators["bank_mention_without_legitimate_sender"] = True
         reasons.append("Mentions banking/financial terms but sender doesn't appear to be a bank")
         score += WEIGHTS["bank_mention_mismatch"]
 
     # 9) Missing contact information
     # Legitimate messages often include contact info or opt-out instructions
-    has_contact_info = bool(re.search(r'(call|contact|reply|stop|unsubscribe)', full_text))
+    has_contact_info = bool(_CONTACT_RE.search(full_text))
     indicators["no_contact_info"] = not has_contact_info
     if not has_contact_info and score > 20:
         # Only add this if already suspicious
@@ -264,7 +300,6 @@ def analyze_sms(sender: Optional[str] = None, number: Optional[str] = None,
 
     # 10) Suspicious sender name
     if sender:
-        sender_lower = sender.lower()
         # Check if sender name mimics legitimate services
         suspicious_sender_patterns = ["bank", "paypal", "amazon", "apple", "google", "microsoft", "netflix", "uber", "whatsapp"]
         if any(pattern in sender_lower for pattern in suspicious_sender_patterns):
@@ -276,7 +311,8 @@ def analyze_sms(sender: Optional[str] = None, number: Optional[str] = None,
     # 11) Check for suspicious patterns in content (typos, unusual formatting)
     if content:
         # Check for excessive use of special characters (common in spam)
-        special_char_ratio = len(re.findall(r'[!@#$%^&*()_+\-=\[\]{};\':"\\|,.<>?]', content)) / max(len(content), 1)
+        special_chars = len(content) - len(content.translate(_DROP_SPECIAL_CHARS))
+        special_char_ratio = special_chars / max(len(content), 1)
         if special_char_ratio > 0.15:  # More than 15% special characters
             indicators["excessive_special_chars"] = True
             reasons.append("Unusual formatting with excessive special characters")
@@ -284,7 +320,7 @@ def analyze_sms(sender: Optional[str] = None, number: Optional[str] = None,
         
         # Check for all caps (common in phishing)
         if len(content) > 10:
-            caps_ratio = sum(1 for c in content if c.isupper()) / len(content)
+            caps_ratio = sum(map(str.isupper, content)) / len(content)
             if caps_ratio > 0.5:  # More than 50% uppercase
                 indicators["excessive_caps"] = True
                 reasons.append("Message uses excessive capitalization")
@@ -315,6 +351,26 @@ def analyze_sms(sender: Optional[str] = None, number: Optional[str] = None,
 
     return result
 
+def analyze_sms_batch(messages: Iterable[dict], columns: bool = False) -> Union[List[dict], Dict[str, list]]:
+    """
+    Analyze many SMS messages (dicts of analyze_sms keyword arguments), in order.
+    Identical messages are analyzed once; repeats get their own copy of the result.
+    With columns=True, returns the results_to_columns view instead, and repeats
+    share one result since no caller sees the dicts.
+    """
+    seen = {}
+    results = []
+    for msg in messages:
+        key = (msg.get("sender"), msg.get("number"), msg.get("content"))
+        result = seen.get(key)
+        if result is not None:
+            if not columns:
+                result = copy_result(result)
+        else:
+            result = seen[key] = analyze_sms(**msg)
+        results.append(result)
+    return results_to_columns(results) if columns else results
+
 # Allow external import
-__all__ = ["analyze_sms"]
+__all__ = ["analyze_sms", "analyze_sms_batch"]
 
@@ -1,21 +1,30 @@
 # backend/core_engine/url_checker.py
 import re
 import math
-import json
 import os
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, NamedTuple, Union
 from urllib.parse import urlparse, unquote
-import tldextract
+from .utils import TLD_EXTRACTOR, file_mtime, read_json, results_to_columns
 
-# Load rules from JSON file
+try:
+    from rapidfuzz.distance import Indel
+except ImportError:  # optional C++ extension; difflib's own quick bounds are used instead
+    Indel = None
+
+URL_RULES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+    "..", "..", "rules", "url_rules.json"
+)
+
+# Load rules from JSON file (read once per process; see clear_cache)
+@lru_cache(maxsize=1)
 def load_url_rules() -> dict:
     """Load URL rules from JSON file"""
-    rules_path = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-        "..", "..", "rules", "url_rules.json"
-    )
     try:
-        with open(rules_path, 'r') as f:
-            return json.load(f)
+        return read_json(URL_RULES_PATH)
     except FileNotFoundError:
         # Fallback to default rules
         return {
@@ -26,211 +35,191 @@ def load_url_rules() -> dict:
         }
 
 # --- Configuration: weights loaded from JSON rules ---
+_DEFAULT_WEIGHTS = {
+    "ip_in_host": 25,
+    "suspicious_tld": 18,
+    "long_url": 6,
+    "many_subdomains": 8,
+    "hyphen_in_domain": 6,
+    "punycode": 20,
+    "suspicious_chars": 6,
+    "suspicious_path_tokens": 6,
+    "url_length_entropy": 5,
+    "known_whitelist": -40,
+    "suspicious_domain_token_long": 6,
+}
+
 def get_weights(rules: dict) -> dict:
     """Get weights from rules JSON, with fallback defaults"""
-    return rules.get("weights", {
-        "ip_in_host": 25,
-        "suspicious_tld": 18,
-        "long_url": 6,
-        "many_subdomains": 8,
-        "hyphen_in_domain": 6,
-        "punycode": 20,
-        "suspicious_chars": 6,
-        "suspicious_path_tokens": 6,
-        "url_length_entropy": 5,
-        "known_whitelist": -40,
-        "suspicious_domain_token_long": 6,
-    })
+    return rules.get("weights", dict(_DEFAULT_WEIGHTS))
+
+class UrlRules(NamedTuple):
+    WEIGHTS: dict
+    SUSPICIOUS_TLDS: frozenset
+    ROOT_DOMAIN_WHITELIST: frozenset
+    SUSPICIOUS_PATH_TOKENS: frozenset
+    DETECT_IP_URLS: bool
+
+@lru_cache(maxsize=1)
+def _compiled_rules() -> UrlRules:
+    """Weights and lookup sets derived from url_rules.json, built once"""
+    rules = load_url_rules()
+    return UrlRules(
+        WEIGHTS=get_weights(rules),
+        SUSPICIOUS_TLDS=frozenset(tld.replace(".", "") for tld in rules.get("suspicious_tlds", [])),
+        ROOT_DOMAIN_WHITELIST=frozenset(rules.get("trusted_domains", [])),
+        SUSPICIOUS_PATH_TOKENS=frozenset(rules.get("phishing_keywords", [])),
+        DETECT_IP_URLS=rules.get("detect_ip_urls", True),
+    )
+
+def clear_cache() -> None:
+    """Drop cached rules and results so the next analyze_url re-reads url_rules.json (e.g. in tests)"""
+    load_url_rules.cache_clear()
+    _compiled_rules.cache_clear()
+    _compiled_analyzer.cache_clear()
+    _analyze_url_cached.cache_clear()
+
+# mtime of url_rules.json the caches were built from; a change clears them
+_rules_mtime = file_mtime(URL_RULES_PATH)
+
+def _check_rules_mtime() -> None:
+    global _rules_mtime
+    mtime = file_mtime(URL_RULES_PATH)
+    if mtime != _rules_mtime:
+        _rules_mtime = mtime
+        clear_cache()
+
+# Regexes compiled once at import
+_SUS_CHARS_RE = re.compile(r"[@\^\[\]\{\}\<\>\\\|]")
+_PATH_TOKEN_RE = re.compile(r"[A-Za-z0-9_-]+")
+_DOMAIN_TOKEN_SPLIT_RE = re.compile(r"[\-\.]")
+# Standard subdomain labels that don't count towards "many subdomains"
+_IGNORED_SUBDOMAINS = frozenset(("www", "m", ""))
+_SUS_DOMAIN_PATTERNS = [
+    (re.compile(pattern, re.IGNORECASE), reason) for pattern, reason in [
+        (r"(.)\1{2,}", "Repeated characters in domain"),  # e.g. gooogle.com
+        (r"(\w)\1{2,}", "Repeated characters in domain"),  # e.g. gooogle.com (alternative pattern)
+        (r"(\w{2,})\1", "Repeated sequence in domain"),  # e.g. googlegoogle.com
+        (r"(\w{3,})(\d+)", "Numbers after brand name"),  # e.g. google123.com
+        (r"(\d+)(\w{3,})", "Numbers before brand name"),  # e.g. 123google.com
+        (r"(\w{3,})-?(?:\w+)?-?(\1)", "Repeated words with separators"),  # e.g. google-account-google.com
+    ]
+]
+# Matches wherever any of the patterns above would, in one search per token
+_SUS_DOMAIN_ANY_RE = re.compile(
+    r"(.)\1{2,}|(\w{2,})\2|\w{3,}\d|\d\w{3,}|(\w{3,})-?(?:\w+)?-?\3",
+    re.IGNORECASE,
+)
 
 # --- Helper utils ---
 def is_ip(host: str) -> bool:
-    # IPv4
-    if re.fullmatch(r"\d{1,3}(?:\.\d{1,3}){3}", host):
-        return True
     # IPv6 bracketed
     if host.startswith("[") and host.endswith("]"):
         return True
-    return False
+    # IPv4: dotted quad of 0-255 octets; most hostnames fail the dot count
+    if host.count(".") != 3:
+        return False
+    return all(p.isdecimal() and len(p) <= 3 and int(p) < 256 for p in host.split("."))
+
+@lru_cache(maxsize=1024)
+def _cached_parse(url: str) -> tuple:
+    """(scheme, host, unquoted path, query, port) of url; repeated URLs skip urlparse"""
+    parsed = urlparse(url)
+    return parsed.scheme, parsed.hostname or "", unquote(parsed.path or ""), parsed.query or "", parsed.port
 
 def contains_punycode(host: str) -> bool:
     return "xn--" in host.lower()
 
+# c * log2(c) for small counts; Shannon entropy is log2(n) - sum(c * log2(c)) / n
+_XLOG2X = [0.0] + [c * math.log2(c) for c in range(1, 4096)]
+
 def entropy_score(s: str) -> float:
     # crude "entropy-ish" measure: character distribution variance
     if not s:
         return 0.0
-    from collections import Counter
-    cnt = Counter(s)
-    probs = [v/len(s) for v in cnt.values()]
-    import math
-    ent = -sum(p * math.log2(p) for p in probs if p>0)
+    n = len(s)
+    total = 0.0
+    for c in Counter(s).values():
+        total += _XLOG2X[c] if c < 4096 else c * math.log2(c)
+    ent = math.log2(n) - total / n
     # normalized roughly to [0,1] by dividing by log2(len(alphabet))
     # use 6 as rough normalizer
     return min(ent / 6.0, 1.0)
 
+def _ratio_at_least(matcher, domain: str, candidate: str, threshold: float) -> bool:
+    """
+    True if difflib's ratio(domain, candidate) >= threshold, using `matcher`
+    (a SequenceMatcher whose seq1 is domain). Most pairs are rejected by a
+    cheap upper bound before the quadratic ratio() runs.
+    """
+    if Indel is not None:
+        # Indel similarity is 2*LCS/(m+n); difflib's matching blocks never exceed
+        # the LCS, so this bounds ratio() from above (epsilon covers float rounding;
+        # no score_cutoff, which rapidfuzz rounds too aggressively at the boundary)
+        if Indel.normalized_similarity(domain, candidate) < threshold - 1e-9:
+            return False
+        matcher.set_seq2(candidate)
+    else:
+        matcher.set_seq2(candidate)
+        if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+            return False
+    return matcher.ratio() >= threshold
+
 # --- Main analysis function ---
 def analyze_url(url: str) -> dict:
     """
-    Analyze a URL and return a structured result:
-    {
-        "url": "...",
-        "score": 0-100,
-        "verdict": "safe" | "suspicious" | "phishing",
-        "reasons": [...],
-        "indicators": {flag: True/False, ...},
-        "parsed": {...}
-    }
+    Analyze a URL and return a structured result (see _analyze_url_impl).
+    Results are memoized per URL string; each call gets its own copy.
     """
-    reasons = []
-    indicators = {}
-    score = 0.0
-
-    # Load rules from JSON file
-    rules = load_url_rules()
-    
-    # Load weights from rules JSON (strictly from JSON)
-    WEIGHTS = get_weights(rules)
-    
-    # Extract rules from JSON
-    SUSPICIOUS_TLDS = set([tld.replace(".", "") for tld in rules.get("suspicious_tlds", [])])
-    ROOT_DOMAIN_WHITELIST = set(rules.get("trusted_domains", []))
-    SUSPICIOUS_PATH_TOKENS = set(rules.get("phishing_keywords", []))
-    DETECT_IP_URLS = rules.get("detect_ip_urls", True)
-
     if not url or not isinstance(url, str):
-        return {
-            "url": url,
-            "score": 100,
-            "verdict": "phishing",
-            "reasons": ["No URL provided or wrong type"],
-            "indicators": {"invalid_input": True},
-            "parsed": {}
-        }
+        return _analyze_url_impl(url)
+    _check_rules_mtime()
+    return _copy_result(_analyze_url_cached(url))
 
-    # Ensure we have a scheme for parsing
-    original = url.strip()
-    if "://" not in original:
-        test_url = "http://" + original
-    else:
-        test_url = original
-
-    parsed = urlparse(test_url)
-    host = parsed.hostname or ""
-    path = unquote(parsed.path or "")
-    query = parsed.query or ""
-
-    extracted = tldextract.extract(host)
-    root_domain = ".".join(part for part in (extracted.domain, extracted.suffix) if part)
-    subdomain = extracted.subdomain or ""
-
-    parsed_info = {
-        "scheme": parsed.scheme,
-        "host": host,
-        "root_domain": root_domain,
-        "subdomain": subdomain,
-        "path": path,
-        "query": query,
-        "port": parsed.port,
-    }
+@lru_cache(maxsize=4096)
+def _analyze_url_cached(url: str) -> dict:
+    return _analyze_url_impl(url)
 
-    # --- Checks ---
+def _copy_result(result: dict) -> dict:
+    """Copy of a cached result deep enough that callers can't mutate the cache"""
+    indicators = {k: list(v) if isinstance(v, list) else v for k, v in result["indicators"].items()}
+    return {
+        **result,
+        "reasons": list(result["reasons"]),
+        "indicators": indicators,
+        "parsed": dict(result["parsed"]),
+    }
 
-    # 1) Host is an IP address (if enabled in rules)
-    if DETECT_IP_URLS:
-        ip_flag = is_ip(host)
-        indicators["ip_in_host"] = ip_flag
-        if ip_flag:
-            reasons.append("Host is an IP address (not a domain) - from url_rules.json")
-            score += WEIGHTS["ip_in_host"]
+def _make_analyzer(rules: UrlRules) -> Callable[[object], dict]:
+    """
+    Build the analyzer for one set of rules. Weights, lookup sets and flags are
+    bound once as closure variables, so a call does no rule or weight lookups.
+    """
+    weights, SUSPICIOUS_TLDS, ROOT_DOMAIN_WHITELIST, SUSPICIOUS_PATH_TOKENS, DETECT_IP_URLS = rules
+    # Weights missing from url_rules.json fall back to the defaults
+    w = {**_DEFAULT_WEIGHTS, **weights}
+    W_IP_IN_HOST = w["ip_in_host"]
+    W_SUSPICIOUS_TLD = w["suspicious_tld"]
+    W_LONG_URL = w["long_url"]
+    W_MANY_SUBDOMAINS = w["many_subdomains"]
+    W_HYPHEN_IN_DOMAIN = w["hyphen_in_domain"]
+    W_PUNYCODE = w["punycode"]
+    W_SUSPICIOUS_CHARS = w["suspicious_chars"]
+    W_SUSPICIOUS_PATH_TOKENS = w["suspicious_path_tokens"]
+    W_URL_LENGTH_ENTROPY = w["url_length_entropy"]
+    W_SUSPICIOUS_DOMAIN_TOKEN_LONG = w["suspicious_domain_token_long"]
 
-    # 2) Suspicious / rare / known-bad TLDs (from JSON rules)
-    suffix_full = (extracted.suffix or "").lower()
-    suffix_top = suffix_full.split(".")[-1]
-    
-    # Check for .gov or any country code TLD (usually 2 characters)
-    is_gov_or_cctld = suffix_top == "gov" or len(suffix_top) == 2
-    
-    tld_flag = suffix_top in SUSPICIOUS_TLDS and not is_gov_or_cctld
-    indicators["suspicious_tld"] = tld_flag
-    
-    if is_gov_or_cctld:
-        reasons.append(f"Top-level domain '.{suffix_full}' is a trusted government or country-specific TLD")
-        score += -20  # Reward trusted TLDs
-    elif tld_flag:
-        reasons.append(f"Top-level domain '{extracted.suffix}' is suspicious/unusual (from url_rules.json)")
-        score += WEIGHTS["suspicious_tld"]
-
-    # 3) Very long URL
-    url_len = len(original)
-    indicators["long_url"] = url_len > 100
-    if url_len > 100:
-        reasons.append(f"URL length is long ({url_len} characters)")
-        score += WEIGHTS["long_url"]
-
-    # 4) Many subdomains (e.g., a.b.c.d.example.com)
-    # 162) Many subdomains (e.g., a.b.c.d.example.com)
-    # Ignore "www" and "m" as they are standard subdomains
-    clean_subdomain = ".".join([p for p in subdomain.split(".") if p not in ["www", "m", ""]])
-    sub_count = clean_subdomain.count(".") + (1 if clean_subdomain else 0)
-    
-    # Only flag if it's not a trusted domain or gov/ccTLD
-    many_subdomains_flag = sub_count >= 2 and not is_gov_or_cctld
-    indicators["many_subdomains"] = many_subdomains_flag
-    if many_subdomains_flag:
-        reasons.append(f"Excessive subdomains detected ({sub_count})")
-        score += WEIGHTS["many_subdomains"]
-
-    # 5) Hyphen in domain (brand impersonation)
-    # Only flag if not a trusted or gov/cc domain
-    hyphen_flag = "-" in extracted.domain and not is_gov_or_cctld
-    indicators["hyphen_in_domain"] = hyphen_flag
-    if hyphen_flag:
-        reasons.append("Hyphen found in root domain (unusual for official entities)")
-        score += WEIGHTS["hyphen_in_domain"]
-
-    # 6) Punycode (IDN homograph attacks)
-    puny_flag = contains_punycode(host)
-    indicators["punycode"] = puny_flag
-    if puny_flag:
-        reasons.append("Punycode found in host (possible homograph attack)")
-        score += WEIGHTS["punycode"]
-
-    # 7) Suspicious characters in path or host (many @, %, javascript:, data:)
-    # Only flag if not trusted
-    suspicious_chars = bool(re.search(r"[@\^\[\]\{\}\<\>\\\|]", original)) and not is_gov_or_cctld
-    indicators["suspicious_chars"] = suspicious_chars
-    if suspicious_chars:
-        reasons.append("Suspicious characters detected in URL")
-        score += WEIGHTS["suspicious_chars"]
-
-    # 8) Suspicious path tokens (from JSON rules - phishing_keywords)
-    path_tokens = set(re.findall(r"[A-Za-z0-9_-]+", path.lower()))
-    suspicious_tokens_found = path_tokens.intersection(SUSPICIOUS_PATH_TOKENS)
-    indicators["suspicious_path_tokens"] = list(suspicious_tokens_found)
-    if suspicious_tokens_found:
-        reasons.append(f"Suspicious path tokens found: {', '.join(sorted(suspicious_tokens_found))}")
-        score += WEIGHTS["suspicious_path_tokens"]
-
-    # 9) Entropy-ish check for path+query
-    ent = entropy_score((path + " " + query).strip())
-    indicators["entropy_score"] = ent
-    if ent > 0.9 and not is_gov_or_cctld:
-        reasons.append("High character entropy in path/query (random-looking)")
-        score += WEIGHTS["url_length_entropy"]
-
-    # 10) Whitelist and misspelling check
     def is_similar_to_whitelisted(domain, threshold=0.8):
         """Check if domain is a likely misspelling of a whitelisted domain"""
-        from difflib import SequenceMatcher
-        
         domain = domain.lower()
+        # Exact whitelist hit: one set lookup, no fuzzy matching
+        if domain in ROOT_DOMAIN_WHITELIST:
+            return True, domain
+
+        matcher = SequenceMatcher(None, domain, "")
         for whitelisted in ROOT_DOMAIN_WHITELIST:
-            if domain == whitelisted:
-                return True, whitelisted
-                
             # Check for common misspellings
-            ratio = SequenceMatcher(None, domain, whitelisted).ratio()
-            if ratio >= threshold:
+            if _ratio_at_least(matcher, domain, whitelisted, threshold):
                 return False, whitelisted  # Likely a misspelling
                 
             # Check for character insertions/deletions (e.g., gooogle.com)
@@ -247,69 +236,231 @@ def analyze_url(url: str) -> dict:
                     
         return False, None
 
-    # Check if domain is in whitelist or a likely misspelling
-    is_whitelisted, matched_whitelist = is_similar_to_whitelisted(root_domain)
-    indicators["known_whitelist"] = is_whitelisted
+    def analyze(url) -> dict:
+        reasons = []
+        score = 0.0
+
+        if not url or not isinstance(url, str):
+            return {
+                "url": url,
+                "score": 100,
+                "verdict": "phishing",
+                "reasons": ["No URL provided or wrong type"],
+                "indicators": {"invalid_input": True},
+                "parsed": {}
+            }
+
+        # Ensure we have a scheme for parsing
+        original = url.strip()
+        if "://" not in original:
+            test_url = "http://" + original
+        else:
+            test_url = original
+
+        scheme, host, path, query, port = _cached_parse(test_url)
+
+        extracted = TLD_EXTRACTOR(host)
+        root_domain = ".".join(part for part in (extracted.domain, extracted.suffix) if part)
+        subdomain = extracted.subdomain or ""
+
+        parsed_info = {
+            "scheme": scheme,
+            "host": host,
+            "root_domain": root_domain,
+            "subdomain": subdomain,
+            "path": path,
+            "query": query,
+            "port": port,
+        }
+
+        # --- Checks ---
+
+        # 1) Host is an IP address (if enabled in rules)
+        if DETECT_IP_URLS:
+            ip_flag = is_ip(host)
+            if ip_flag:
+                reasons.append("Host is an IP address (not a domain) - from url_rules.json")
+                score += W_IP_IN_HOST
+
+        # 2) Suspicious / rare / known-bad TLDs (from JSON rules)
+        suffix_full = (extracted.suffix or "").lower()
+        suffix_top = suffix_full.rpartition(".")[2]
     
-    if is_whitelisted or is_gov_or_cctld:
-        reasons.append(f"Trust verified: Result is within a secure/official name space ('{root_domain}')")
-        score += -40  # Massive score reduction for trusted entities
-    elif matched_whitelist:
-        reasons.append(f"Alert: Domain '{root_domain}' mimics trusted brand '{matched_whitelist}'")
-        score += 65  # Immediate suspicious/phishing for mimicry
-
-    # 11) Additional checks for whitelisted domains
-    if is_whitelisted or matched_whitelist:
-        domain_tokens = re.split(r"[\-\.]", extracted.domain or "")
-        
-        # Check for suspicious patterns in domain tokens
-        suspicious_patterns = [
-            (r"(.)\1{2,}", "Repeated characters in domain"),  # e.g. gooogle.com
-            (r"(\w)\1{2,}", "Repeated characters in domain"),  # e.g. gooogle.com (alternative pattern)
-            (r"(\w{2,})\1", "Repeated sequence in domain"),  # e.g. googlegoogle.com
-            (r"(\w{3,})(\d+)", "Numbers after brand name"),  # e.g. google123.com
-            (r"(\d+)(\w{3,})", "Numbers before brand name"),  # e.g. 123google.com
-            (r"(\w{3,})-?(?:\w+)?-?(\1)", "Repeated words with separators"),  # e.g. google-account-google.com
-        ]
-        
-        for pattern, reason in suspicious_patterns:
-            if any(re.search(pattern, token, re.IGNORECASE) for token in domain_tokens):
-                reasons.append(f"Suspicious domain pattern detected: {reason}")
-                score += 30
-                break
+        # Check for .gov or any country code TLD (usually 2 characters)
+        is_gov_or_cctld = suffix_top == "gov" or len(suffix_top) == 2
+    
+        tld_flag = suffix_top in SUSPICIOUS_TLDS and not is_gov_or_cctld
+    
+        if is_gov_or_cctld:
+            reasons.append(f"Top-level domain '.{suffix_full}' is a trusted government or country-specific TLD")
+            score += -20  # Reward trusted TLDs
+        elif tld_flag:
+            reasons.append(f"Top-level domain '{extracted.suffix}' is suspicious/unusual (from url_rules.json)")
+            score += W_SUSPICIOUS_TLD
+
+        # 3) Very long URL
+        url_len = len(original)
+        long_url_flag = url_len > 100
+        if long_url_flag:
+            reasons.append(f"URL length is long ({url_len} characters)")
+            score += W_LONG_URL
+
+        # 4) Many subdomains (e.g., a.b.c.d.example.com)
+        # 162) Many subdomains (e.g., a.b.c.d.example.com)
+        # Ignore "www" and "m" as they are standard subdomains
+        sub_count = sum(1 for p in subdomain.split(".") if p not in _IGNORED_SUBDOMAINS) if subdomain else 0
+    
+        # Only flag if it's not a trusted domain or gov/ccTLD
+        many_subdomains_flag = sub_count >= 2 and not is_gov_or_cctld
+        if many_subdomains_flag:
+            reasons.append(f"Excessive subdomains detected ({sub_count})")
+            score += W_MANY_SUBDOMAINS
+
+        # 5) Hyphen in domain (brand impersonation)
+        # Only flag if not a trusted or gov/cc domain
+        hyphen_flag = "-" in extracted.domain and not is_gov_or_cctld
+        if hyphen_flag:
+            reasons.append("Hyphen found in root domain (unusual for official entities)")
+            score += W_HYPHEN_IN_DOMAIN
+
+        # 6) Punycode (IDN homograph attacks)
+        puny_flag = contains_punycode(host)
+        if puny_flag:
+            reasons.append("Punycode found in host (possible homograph attack)")
+            score += W_PUNYCODE
+
+        # 7) Suspicious characters in path or host (many @, %, javascript:, data:)
+        # Only flag if not trusted
+        suspicious_chars = bool(_SUS_CHARS_RE.search(original)) and not is_gov_or_cctld
+        if suspicious_chars:
+            reasons.append("Suspicious characters detected in URL")
+            score += W_SUSPICIOUS_CHARS
+
+        # 8) Suspicious path tokens (from JSON rules - phishing_keywords)
+        # Only matching tokens are kept (deduplicated, in path order); no set of all tokens
+        suspicious_tokens_found = dict.fromkeys(
+            token for token in _PATH_TOKEN_RE.findall(path.lower()) if token in SUSPICIOUS_PATH_TOKENS
+        )
+        if suspicious_tokens_found:
+            reasons.append(f"Suspicious path tokens found: {', '.join(sorted(suspicious_tokens_found))}")
+            score += W_SUSPICIOUS_PATH_TOKENS
+
+        # 9) Entropy-ish check for path+query
+        ent = entropy_score((path + " " + query).strip())
+        if ent > 0.9 and not is_gov_or_cctld:
+            reasons.append("High character entropy in path/query (random-looking)")
+            score += W_URL_LENGTH_ENTROPY
+
+        # 10) Whitelist and misspelling check
+        # Check if domain is in whitelist or a likely misspelling
+        is_whitelisted, matched_whitelist = is_similar_to_whitelisted(root_domain)
+    
+        if is_whitelisted or is_gov_or_cctld:
+            reasons.append(f"Trust verified: Result is within a secure/official name space ('{root_domain}')")
+            score += -40  # Massive score reduction for trusted entities
+        elif matched_whitelist:
+            reasons.append(f"Alert: Domain '{root_domain}' mimics trusted brand '{matched_whitelist}'")
+            score += 65  # Immediate suspicious/phishing for mimicry
+
+        # 11) Additional checks for whitelisted domains
+        if is_whitelisted or matched_whitelist:
+            domain_tokens = _DOMAIN_TOKEN_SPLIT_RE.split(extracted.domain or "")
+
+            # Check for suspicious patterns in domain tokens; the combined regex
+            # finds the tokens that match anything, the ordered list picks the reason
+            flagged_tokens = [token for token in domain_tokens if _SUS_DOMAIN_ANY_RE.search(token)]
+            for pattern, reason in (_SUS_DOMAIN_PATTERNS if flagged_tokens else ()):
+                if any(pattern.search(token) for token in flagged_tokens):
+                    reasons.append(f"Suspicious domain pattern detected: {reason}")
+                    score += 30
+                    break
         
-        # Check for long tokens
-        suspicious_token_flag = any(len(tok) > 20 for tok in domain_tokens)
-        indicators["suspicious_domain_token_long"] = suspicious_token_flag
-        if suspicious_token_flag:
-            reasons.append("Unusually long token in domain name")
-            score += WEIGHTS.get("suspicious_domain_token_long", 6)
-
-    # --- Final score normalization ---
-    # Clip score to [0, 100]
-    raw_score = max(0, score)
-    # If negative due to whitelist weight, allow it but clamp after mapping
-    mapped = int(min(max(raw_score, 0), 100))
-
-    # Convert score to verdict thresholds (tweakable)
-    if mapped >= 65:
-        verdict = "phishing"
-    elif mapped >= 30:
-        verdict = "suspicious"
-    else:
-        verdict = "safe"
+            # Check for long tokens
+            suspicious_token_flag = any(len(tok) > 20 for tok in domain_tokens)
+            if suspicious_token_flag:
+                reasons.append("Unusually long token in domain name")
+                score += W_SUSPICIOUS_DOMAIN_TOKEN_LONG
 
-    result = {
-        "url": original,
-        "score": mapped,
-        "verdict": verdict,
-        "reasons": reasons or ["No obvious automated red flags detected"],
-        "indicators": indicators,
-        "parsed": parsed_info
+        # Indicators are collected once here rather than written check by check
+        indicators = {"ip_in_host": ip_flag} if DETECT_IP_URLS else {}
+        indicators.update(
+            suspicious_tld=tld_flag,
+            long_url=long_url_flag,
+            many_subdomains=many_subdomains_flag,
+            hyphen_in_domain=hyphen_flag,
+            punycode=puny_flag,
+            suspicious_chars=suspicious_chars,
+            suspicious_path_tokens=list(suspicious_tokens_found),
+            entropy_score=ent,
+            known_whitelist=is_whitelisted,
+        )
+        if is_whitelisted or matched_whitelist:
+            indicators["suspicious_domain_token_long"] = suspicious_token_flag
+
+        # --- Final score normalization ---
+        # Clip score to [0, 100]
+        raw_score = max(0, score)
+        # If negative due to whitelist weight, allow it but clamp after mapping
+        mapped = int(min(max(raw_score, 0), 100))
+
+        # Convert score to verdict thresholds (tweakable)
+        if mapped >= 65:
+            verdict = "phishing"
+        elif mapped >= 30:
+            verdict = "suspicious"
+        else:
+            verdict = "safe"
+
+        result = {
+            "url": original,
+            "score": mapped,
+            "verdict": verdict,
+            "reasons": reasons or ["No obvious automated red flags detected"],
+            "indicators": indicators,
+            "parsed": parsed_info
+        }
+
+        return result
+
+    return analyze
+
+@lru_cache(maxsize=1)
+def _compiled_analyzer() -> Callable[[object], dict]:
+    return _make_analyzer(_compiled_rules())
+
+def _analyze_url_impl(url: str) -> dict:
+    """
+    Analyze a URL and return a structured result:
+    {
+        "url": "...",
+        "score": 0-100,
+        "verdict": "safe" | "suspicious" | "phishing",
+        "reasons": [...],
+        "indicators": {flag: True/False, ...},
+        "parsed": {...}
     }
+    """
+    return _compiled_analyzer()(url)
 
-    return result
+def analyze_urls(urls: Iterable[str], columns: bool = False) -> Union[List[dict], Dict[str, list]]:
+    """
+    Analyze many URLs, in order.
+    The rules file is checked once per batch, and each distinct URL is analyzed
+    once; repeats (and URLs seen in earlier calls) come from the result cache.
+    With columns=True, returns the results_to_columns view instead, read
+    straight from the cached results without copying them.
+    """
+    _check_rules_mtime()
+    if columns:
+        return results_to_columns(
+            _analyze_url_cached(url) if url and isinstance(url, str) else _analyze_url_impl(url)
+            for url in urls
+        )
+    return [
+        _copy_result(_analyze_url_cached(url)) if url and isinstance(url, str) else _analyze_url_impl(url)
+        for url in urls
+    ]
 
 # Allow external import name
-__all__ = ["analyze_url"]
+__all__ = ["analyze_url", "analyze_urls"]
 
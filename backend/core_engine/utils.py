@@ -1,5 +1,113 @@
+import os
+import re
+import orjson
 import tldextract
 from urllib.parse import urlparse
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import ahocorasick
+except ImportError:  # optional C extension; fall back to per-phrase scans
+    ahocorasick = None
+
+def file_mtime(path: str) -> Optional[float]:
+    """Modification time of a file, or None if it does not exist (used to key rule caches)"""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+def read_json(path: str):
+    """Parse a JSON file with orjson (read as bytes, no text decoding pass)"""
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+def copy_result(result: dict) -> dict:
+    """Copy of an analyzer result deep enough that mutating it can't change the original"""
+    copied = {}
+    for key, value in result.items():
+        if isinstance(value, list):
+            value = list(value)
+        elif isinstance(value, dict):
+            value = {k: list(v) if isinstance(v, list) else v for k, v in value.items()}
+        copied[key] = value
+    return copied
+
+def results_to_columns(results: Iterable[dict], fields: Iterable[str] = ("score", "verdict")) -> Dict[str, list]:
+    """
+    Struct-of-arrays view of analyzer results for bulk aggregation.
+    Returns one list per requested field plus one list per indicator flag
+    (False where a result does not set that flag), all aligned by position.
+    """
+    results = list(results)
+    columns = {field: [r.get(field) for r in results] for field in fields}
+    flags = {}
+    for r in results:
+        for flag in r.get("indicators", {}):
+            flags.setdefault(flag, None)
+    for flag in flags:
+        columns[f"indicators.{flag}"] = [r.get("indicators", {}).get(flag, False) for r in results]
+    return columns
+
+# Plural and verb endings a keyword may carry ("accounts", "rewarded", "bonuses")
+_KEYWORD_INFLECTIONS = r'(?:s|es|ed|ing)?'
+
+def build_keyword_finder(keywords: Iterable[str]) -> Callable[[str], frozenset]:
+    """
+    Build a function mapping lower-cased text to the set of keywords it contains as
+    whole words, allowing plural/-ed/-ing endings ("won" still doesn't match "wonder").
+    All keywords are found in one regex scan.
+    """
+    keywords = sorted(set(keywords), key=len, reverse=True)
+    if not keywords:
+        return lambda text: frozenset()
+    alternation = "|".join(re.escape(k) for k in keywords)
+    pattern = re.compile(r'\b(' + alternation + r')' + _KEYWORD_INFLECTIONS + r'\b')
+
+    def find(text: str) -> frozenset:
+        return frozenset(pattern.findall(text))
+    return find
+
+# Host of an http(s) link without userinfo or port; bracketed IPv6 literals kept whole
+_HOST_RE = re.compile(r'https?://(?:[^/?#\s@]*@)?(\[[^\]/?#\s]*\]|[^/:?#\s]+)', re.IGNORECASE)
+
+@lru_cache(maxsize=4096)
+def url_host(url: str) -> str:
+    """Lower-cased host of an http(s) link, or "" if there is none"""
+    m = _HOST_RE.match(url)
+    return m.group(1).lower() if m else ""
+
+# One extractor for the whole process, built from the bundled suffix snapshot
+# so no request ever waits on a Public Suffix List download
+TLD_EXTRACTOR = tldextract.TLDExtract(cache_dir=None, suffix_list_urls=(), fallback_to_snapshot=True)
+
+def warm_up_tld_extractor() -> None:
+    """Parse the suffix snapshot now (it is otherwise parsed lazily on the first lookup)"""
+    TLD_EXTRACTOR("warmup.com")
+
+# TLDs with no multi-label public suffixes beneath them, so the registered
+# domain is always the last two labels (io, co, me, ai, ... are not: gov.io)
+_SIMPLE_TLDS = frozenset({
+    "com", "net", "org", "info", "biz", "edu", "gov", "mil", "xyz",
+    "app", "dev", "top", "online", "site", "shop", "ru", "de", "nl",
+})
+
+def _root_domain_fast(host: str):
+    """(domain, suffix) via rsplit for single-label TLDs; None when tldextract is needed"""
+    parts = host.rsplit(".", 2)
+    if len(parts) >= 2 and parts[-1] in _SIMPLE_TLDS and "@" not in parts[-2]:
+        return parts[-2], parts[-1]
+    return None
+
+@lru_cache(maxsize=4096)
+def _extract_root_cached(host: str) -> Tuple[str, str]:
+    extracted = TLD_EXTRACTOR(host)
+    return extracted.domain.lower(), extracted.suffix.lower()
+
+def extract_root(host: str) -> Tuple[str, str]:
+    """Return the (domain, suffix) pair for a lower-cased host, e.g. ('google', 'co.uk')"""
+    return _root_domain_fast(host) or _extract_root_cached(host)
 
 def extract_domain(url: str) -> str:
     """
@@ -9,7 +117,7 @@ def extract_domain(url: str) -> str:
     if not url:
         return ""
 
-    parsed = tldextract.extract(url)
+    parsed = TLD_EXTRACTOR(url)
 
     if parsed.domain and parsed.suffix:
         return f"{parsed.domain}.{parsed.suffix}"
@@ -20,3 +128,32 @@ def extract_domain(url: str) -> str:
         return parsed_url.netloc
     except:
         return ""
+
+
+def build_phrase_matcher(categories: Dict[str, Iterable[str]]) -> Callable[[str], Dict[str, List[str]]]:
+    """
+    Builds a matcher for several phrase lists at once.
+    The returned function maps lower-cased text to {category: [phrases found]},
+    listing each phrase in its original order, the same as `phrase in text` loops.
+    With pyahocorasick installed the text is scanned in a single pass.
+    """
+    categories = {
+        cat: tuple(p.lower() for p in phrases if p)
+        for cat, phrases in categories.items()
+    }
+    phrases_all = {p for phrases in categories.values() for p in phrases}
+
+    if ahocorasick is None or not phrases_all:
+        def match(text: str) -> Dict[str, List[str]]:
+            return {cat: [p for p in phrases if p in text] for cat, phrases in categories.items()}
+        return match
+
+    automaton = ahocorasick.Automaton()
+    for phrase in phrases_all:
+        automaton.add_word(phrase, phrase)
+    automaton.make_automaton()
+
+    def match(text: str) -> Dict[str, List[str]]:
+        found = {phrase for _, phrase in automaton.iter(text)}
+        return {cat: [p for p in phrases if p in found] for cat, phrases in categories.items()}
+    return match
@@ -1,7 +1,26 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker, scoped_session
 from .config import DATABASE_URL
 
-engine = create_engine(DATABASE_URL, echo=False)
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_size=20,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if engine.url.get_backend_name() == "sqlite":
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets readers and the writer run concurrently; NORMAL skips the fsync per commit"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA cache_size=-65536")
+        cursor.close()
+
+# One session per thread/request; call SessionLocal.remove() when done with it
+SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
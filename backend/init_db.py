@@ -7,12 +7,13 @@ Run this from the phishing_line directory:
     python3 -m backend.init_db
 """
 from .db import engine, SessionLocal
-from .models import Base, User
+from .models import Base, User, upgrade_schema
 
 def init_database():
     """Create all database tables and default admin user"""
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
     print("✓ Database tables created successfully!")
     print(f"Database location: {engine.url}")
     
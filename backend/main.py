@@ -22,6 +22,28 @@ if parent_dir not in sys.path:
 # Now import using absolute import
 from backend.app import app
 
+try:
+    from waitress import serve
+except ImportError:  # optional; falls back to Flask's threaded server
+    serve = None
+
+HOST = "0.0.0.0"
+PORT = 5000
+THREADS = 8
+
+def debug_enabled() -> bool:
+    """FLASK_DEBUG=1 opts back into Flask's debug server with the reloader"""
+    return os.getenv("FLASK_DEBUG", "").lower() in ("1", "true", "yes")
+
+def serve_app():
+    """Serve the app with waitress, or Flask's dev server in debug mode / without waitress"""
+    if debug_enabled():
+        app.run(host=HOST, port=PORT, debug=True)
+    elif serve is not None:
+        serve(app, host=HOST, port=PORT, threads=THREADS)
+    else:
+        app.run(host=HOST, port=PORT, threaded=True)
+
 def start():
     """Start the Flask server"""
     print("=" * 50)
@@ -32,7 +54,7 @@ def start():
     print("API Base: http://127.0.0.1:5000/api")
     print("Press Ctrl+C to stop")
     print("=" * 50)
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    serve_app()
 
 if __name__ == "__main__":
     start()
@@ -1,18 +1,74 @@
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Boolean, Index, insert, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+from collections import Counter
 from datetime import datetime
+import orjson
 from werkzeug.security import generate_password_hash, check_password_hash
 
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:  # optional; werkzeug's pbkdf2 hashes are used instead
+    PasswordHasher = None
+
 Base = declarative_base()
 
+_PH = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=2) if PasswordHasher else None
+
+def hash_password(password):
+    """argon2id hash of password, or werkzeug's pbkdf2 when argon2-cffi is missing"""
+    if _PH is not None:
+        return _PH.hash(password)
+    return generate_password_hash(password)
+
+def verify_password(password_hash, password):
+    """Check password against an argon2 hash or a legacy werkzeug hash"""
+    if password_hash.startswith("$argon2"):
+        if _PH is None:
+            return False
+        try:
+            return _PH.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return check_password_hash(password_hash, password)
+
+def password_needs_rehash(password_hash):
+    """True for legacy werkzeug hashes or argon2 hashes with outdated parameters"""
+    if _PH is None:
+        return False
+    if not password_hash.startswith("$argon2"):
+        return True
+    return _PH.check_needs_rehash(password_hash)
+
 class ScanLog(Base):
     __tablename__ = "scan_logs"
 
     id = Column(Integer, primary_key=True, index=True)
-    scan_type = Column(String)
+    scan_type = Column(String(16))
     input_value = Column(String)
-    result = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    verdict = Column(String(16), index=True)
+    summary = Column(String(256))
+    result = Column(Text)  # JSON scan details (older rows also hold verdict/summary here)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+# Reports filter by type and list newest first
+Index("ix_scanlog_type_created", ScanLog.scan_type, ScanLog.created_at.desc())
+# Recent scans with a given verdict
+Index("ix_scanlog_verdict_created", ScanLog.verdict, ScanLog.created_at.desc())
+
+class ScanCounter(Base):
+    """Number of scans per type, day and verdict, shared by all workers"""
+    __tablename__ = "scan_counters"
+    __table_args__ = (
+        Index("ux_scan_counters_key", "scan_type", "date", "verdict", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    scan_type = Column(String, nullable=False)
+    date = Column(Date, nullable=False)
+    verdict = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
 
 class User(Base):
     __tablename__ = "users"
@@ -26,11 +82,15 @@ class User(Base):
 
     def set_password(self, password):
         """Hash and set the user's password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         """Check if the provided password matches the hash"""
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """True if the stored hash should be replaced on the next successful login"""
+        return password_needs_rehash(self.password_hash)
 
     def to_dict(self):
         """Convert user to dictionary (without password)"""
@@ -41,3 +101,55 @@ class User(Base):
             "is_admin": self.is_admin,
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
+
+def upgrade_schema(bind):
+    """Add columns and indexes that are missing on tables which already exist"""
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=bind.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+    _backfill_scan_counters(bind)
+
+def _logged_verdict(verdict, result):
+    """Normalised verdict of a scan_logs row; older rows only have it inside the result JSON"""
+    if verdict is None and result:
+        try:
+            verdict = orjson.loads(result).get("verdict")
+        except (ValueError, AttributeError):
+            verdict = None
+    verdict = verdict.lower() if isinstance(verdict, str) else ""
+    return verdict if verdict in ("phishing", "suspicious") else "safe"
+
+def _backfill_scan_counters(bind):
+    """Count scans logged before scan_counters existed, so totals and charts keep their history"""
+    with bind.connect() as conn:
+        if conn.execute(select(ScanCounter.id).limit(1)).first() is not None:
+            return
+        counts = Counter()
+        rows = conn.execution_options(yield_per=1000).execute(
+            select(ScanLog.scan_type, ScanLog.verdict, ScanLog.result, ScanLog.created_at)
+        )
+        for scan_type, verdict, result, created_at in rows:
+            if scan_type and created_at is not None:
+                counts[(scan_type.lower(), created_at.date(), _logged_verdict(verdict, result))] += 1
+    if not counts:
+        return
+    try:
+        with bind.begin() as conn:
+            conn.execute(insert(ScanCounter), [
+                {"scan_type": scan_type, "date": day, "verdict": verdict, "count": count}
+                for (scan_type, day, verdict), count in counts.items()
+            ])
+    except IntegrityError:
+        pass  # another worker backfilled the counters first
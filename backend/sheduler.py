@@ -1,9 +1,16 @@
+from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.schedulers.background import BackgroundScheduler
 
 def job():
     print("Scheduled task running...")
 
 def start_scheduler():
-    scheduler = BackgroundScheduler()
+    # One small shared pool; overdue runs collapse into one instead of piling up
+    scheduler = BackgroundScheduler(
+        executors={"default": ThreadPoolExecutor(max_workers=2)},
+        job_defaults={"coalesce": True, "max_instances": 1},
+        daemon=True,
+    )
     scheduler.add_job(job, "interval", hours=24)
     scheduler.start()
+    return scheduler
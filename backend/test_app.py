@@ -0,0 +1,189 @@
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# Point the app at a throwaway database before it is imported
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cachetools import TTLCache
+from sqlalchemy import func
+
+from backend import app as app_module
+from backend.db import SessionLocal
+from backend.models import ScanCounter, ScanLog, User
+
+client = app_module.app.test_client()
+
+def _scan_log_count(scan_type):
+    db = SessionLocal()
+    try:
+        return db.query(func.count(ScanLog.id)).filter(ScanLog.scan_type == scan_type).scalar()
+    finally:
+        SessionLocal.remove()
+
+def _counter_total(scan_type):
+    db = SessionLocal()
+    try:
+        return db.query(func.coalesce(func.sum(ScanCounter.count), 0)).filter(ScanCounter.scan_type == scan_type).scalar()
+    finally:
+        SessionLocal.remove()
+
+def _counter_total_for(scan_type, verdict):
+    db = SessionLocal()
+    try:
+        return db.query(func.coalesce(func.sum(ScanCounter.count), 0)).filter(
+            ScanCounter.scan_type == scan_type, ScanCounter.verdict == verdict
+        ).scalar()
+    finally:
+        SessionLocal.remove()
+
+def _entry(scan_type, input_value, verdict="safe"):
+    row = {
+        "scan_type": scan_type.upper(),
+        "input_value": input_value,
+        "verdict": verdict,
+        "summary": "",
+        "result": {},
+        "created_at": datetime.utcnow(),
+    }
+    return row, verdict
+
+def test_bad_row_does_not_drop_its_batch():
+    logs, counted = _scan_log_count("SMS"), _counter_total("sms")
+    batch = [_entry("sms", "+1555000%d" % i) for i in range(3)]
+    batch.insert(1, _entry("sms", ["not", "a", "string"]))
+
+    app_module._write_scan_logs(batch)
+
+    assert _scan_log_count("SMS") == logs + 3
+    assert _counter_total("sms") == counted + 3
+
+def test_non_string_url_is_logged():
+    logs = _scan_log_count("URL")
+
+    assert client.post("/scan-url", json={"url": ["http://x.com"]}).status_code == 200
+    assert client.post("/scan-url", json={"url": "http://example.com"}).status_code == 200
+    app_module.flush_scan_logs()
+
+    assert _scan_log_count("URL") == logs + 2
+
+def test_row_and_counters_share_normalised_verdict():
+    phishing, safe = _counter_total_for("url", "phishing"), _counter_total_for("url", "safe")
+
+    app_module.update_stats("url", "PHISHING", "http://a.example", "a")
+    app_module.update_stats("url", None, "http://b.example", "b")
+    app_module.flush_scan_logs()
+
+    db = SessionLocal()
+    try:
+        verdicts = {
+            value: verdict for value, verdict in db.query(ScanLog.input_value, ScanLog.verdict)
+            .filter(ScanLog.input_value.in_(["http://a.example", "http://b.example"]))
+        }
+    finally:
+        SessionLocal.remove()
+    assert verdicts == {"http://a.example": "phishing", "http://b.example": "safe"}
+    assert _counter_total_for("url", "phishing") == phishing + 1
+    assert _counter_total_for("url", "safe") == safe + 1
+
+def test_counters_without_on_conflict_support(monkeypatch):
+    monkeypatch.setattr(app_module, "upsert", None)
+    counted = _counter_total("email")
+
+    app_module._write_scan_logs([_entry("email", "a@example.com")])
+    app_module._write_scan_logs([_entry("email", "b@example.com"), _entry("email", "c@example.com")])
+
+    assert _counter_total("email") == counted + 3
+
+def test_full_log_queue_drops_and_counts(monkeypatch):
+    full = queue.Queue(maxsize=1)
+    full.put(_entry("email", "queued"))
+    monkeypatch.setattr(app_module, "_log_queue", full)
+    monkeypatch.setattr(app_module, "LOG_QUEUE_PUT_TIMEOUT", 0.01)
+    dropped = app_module._dropped_scan_logs
+
+    app_module._enqueue_scan_log(_entry("email", "dropped"))
+
+    assert app_module._dropped_scan_logs == dropped + 1
+    assert full.qsize() == 1
+
+def test_shutdown_does_not_wait_on_a_stuck_writer(monkeypatch):
+    stuck = threading.Event()
+    log_queue, stop = queue.Queue(), threading.Event()
+    writer = threading.Thread(target=app_module._drain_loop, args=(log_queue, stop), daemon=True)
+    monkeypatch.setattr(app_module, "_log_queue", log_queue)
+    monkeypatch.setattr(app_module, "_stop_writer", stop)
+    monkeypatch.setattr(app_module, "_log_writer", writer)
+    monkeypatch.setattr(app_module, "_write_scan_logs", lambda batch: stuck.wait())
+    writer.start()
+    app_module._enqueue_scan_log(_entry("email", "stuck"))
+
+    started = time.monotonic()
+    app_module.stop_scan_log_writer(timeout=0.1)
+    assert time.monotonic() - started < 1
+    assert writer.is_alive()
+
+    # Once the write completes the writer finds the queue drained and exits
+    stuck.set()
+    writer.join(5)
+    assert not writer.is_alive()
+
+def _login(username, password):
+    return client.post("/api/auth/login", json={"username": username, "password": password})
+
+def test_login_right_after_registration():
+    assert _login("carol", "secret1").status_code == 401
+    assert _login("carol", "secret1").status_code == 401  # served from the negative cache
+
+    registered = client.post("/api/auth/register", json={
+        "username": "carol", "email": "carol@example.com", "password": "secret1",
+    })
+    assert registered.status_code == 201
+    assert _login("carol", "secret1").status_code == 200
+
+def test_login_after_registration_on_another_worker(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(app_module, "_missing_users", TTLCache(
+        maxsize=100, ttl=app_module.MISSING_USER_TTL, timer=lambda: clock[0],
+    ))
+    assert _login("dave", "secret1").status_code == 401
+
+    # Another worker's registration: this process's negative cache is never told
+    db = SessionLocal()
+    try:
+        user = User(username="dave", email="dave@example.com")
+        user.set_password("secret1")
+        db.add(user)
+        db.commit()
+    finally:
+        SessionLocal.remove()
+
+    assert _login("dave", "secret1").status_code == 401  # still within the cached miss
+    clock[0] += app_module.MISSING_USER_TTL
+    assert _login("dave", "secret1").status_code == 200
+
+def test_unhashed_assets_revalidate():
+    response = client.get("/assets/styles.css")
+    etag = response.headers["ETag"]
+    response.close()
+    assert response.headers["Cache-Control"] == "no-cache, max-age=0"
+
+    revalidated = client.get("/assets/styles.css", headers={"If-None-Match": etag})
+    revalidated.close()
+    assert revalidated.status_code == 304
+
+def test_fingerprinted_assets_are_cached(tmp_path, monkeypatch):
+    (tmp_path / "app.3f2a9c1d.js").write_text("console.log(1);")
+    monkeypatch.setattr(app_module, "FRONTEND_DIR", str(tmp_path))
+
+    response = client.get("/app.3f2a9c1d.js")
+    response.close()
+    cache_control = response.cache_control
+    assert cache_control.max_age == app_module.FINGERPRINTED_MAX_AGE
+    assert cache_control.public
+    assert cache_control.immutable
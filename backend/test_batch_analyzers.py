@@ -0,0 +1,51 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core_engine.email_checker import analyze_emails_batch
+from backend.core_engine.sms_checker import analyze_sms_batch
+from backend.core_engine.url_checker import analyze_urls
+
+def _assert_independent(results):
+    first, repeat = results
+    assert first == repeat
+    repeat["id"] = 1
+    repeat["reasons"].clear()
+    repeat["indicators"].clear()
+    assert "id" not in first
+    assert first["reasons"]
+    assert first["indicators"]
+
+def test_email_batch_repeats_are_copies():
+    msg = {"sender": "admin@googie.com", "subject": "urgent", "content": "verify now http://x.com"}
+    _assert_independent(analyze_emails_batch([msg, dict(msg)]))
+
+def test_sms_batch_repeats_are_copies():
+    msg = {"sender": "Bank", "number": "+000", "content": "click http://bit.ly/x"}
+    _assert_independent(analyze_sms_batch([msg, dict(msg)]))
+
+def test_url_batch_repeats_are_copies():
+    _assert_independent(analyze_urls(["http://gooogle.com/login"] * 2))
+
+def test_columns_match_the_result_dicts():
+    msgs = [
+        {"sender": "admin@googie.com", "subject": "urgent", "content": "verify now http://x.com"},
+        {"sender": "friend@example.com", "subject": "hi", "content": "lunch?"},
+    ]
+    results = analyze_emails_batch(msgs + msgs[:1])
+    columns = analyze_emails_batch(msgs + msgs[:1], columns=True)
+
+    assert columns["score"] == [r["score"] for r in results]
+    assert columns["verdict"] == [r["verdict"] for r in results]
+    flags = {flag for r in results for flag in r["indicators"]}
+    assert {key for key in columns if key.startswith("indicators.")} == {"indicators." + f for f in flags}
+    for flag in flags:
+        assert columns["indicators." + flag] == [r["indicators"].get(flag, False) for r in results]
+
+def test_sms_and_url_columns():
+    sms = [{"sender": "Bank", "number": "+000", "content": "click http://bit.ly/x"}] * 2
+    assert analyze_sms_batch(sms, columns=True)["verdict"] == [r["verdict"] for r in analyze_sms_batch(sms)]
+
+    urls = ["http://gooogle.com/login", "https://example.com", "http://gooogle.com/login"]
+    assert analyze_urls(urls, columns=True)["score"] == [r["score"] for r in analyze_urls(urls)]
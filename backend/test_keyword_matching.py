@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core_engine.email_checker import analyze_email
+from backend.core_engine.sms_checker import analyze_sms
+from backend.core_engine.utils import build_keyword_finder
+
+def test_inflected_keywords_match():
+    find = build_keyword_finder(("account", "password", "gift", "reward", "prize", "bonus", "bank"))
+    found = find("check your accounts and passwords: gifts, rewarded prizes, bonuses from banking partners")
+    assert found == {"account", "password", "gift", "reward", "prize", "bonus", "bank"}
+
+def test_keywords_need_a_word_start_and_end():
+    find = build_keyword_finder(("won", "free", "pin"))
+    assert find("a wonderful freedom of shopping") == frozenset()
+    assert find("you won a free pin") == {"won", "free", "pin"}
+
+def test_plural_keywords_still_flag_messages():
+    email = analyze_email(sender="news@shop.example", subject="Hi", content="Claim your rewards and prizes")
+    assert email["indicators"]["too_good_to_be_true"]
+
+    sms = analyze_sms(sender="Shop", number="+15551234567", content="Confirm your passwords for payments")
+    assert sms["indicators"]["info_request"]
+    assert sms["indicators"]["bank_mention_without_legitimate_sender"]
@@ -0,0 +1,62 @@
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core_engine import email_checker
+from backend.core_engine.email_checker import _levenshtein_py, levenshtein_distance
+
+def _levenshtein_dp(s1, s2):
+    """Textbook two-row DP, the reference for the bit-parallel fallback"""
+    prev = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1, 1):
+        cur = [i]
+        for j, c2 in enumerate(s2, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (c1 != c2)))
+        prev = cur
+    return prev[-1]
+
+EDGE_CASES = [
+    ("", ""),
+    ("", "abc"),
+    ("abc", ""),
+    ("a", "a"),
+    ("a", "b"),
+    ("google", "googie"),
+    ("paypal", "paypa1"),
+    ("kitten", "sitting"),
+    ("a" * 63, "a" * 64),
+    ("a" * 64, "b" * 64),
+    ("ab" * 40, "ba" * 40),
+    ("x" * 100 + "y", "y" + "x" * 100),
+    ("аpple", "apple"),  # Cyrillic а
+    ("straße", "strasse"),
+    ("日本語テキスト", "日本語のテキスト"),
+    ("😀😃😄", "😀😄"),
+]
+
+def test_fallback_matches_dp_on_edge_cases():
+    for s1, s2 in EDGE_CASES:
+        expected = _levenshtein_dp(s1, s2)
+        assert _levenshtein_py(s1, s2) == expected, (s1, s2)
+        assert _levenshtein_py(s2, s1) == expected, (s2, s1)
+
+def test_fallback_matches_dp_on_random_pairs():
+    rng = random.Random(1234)
+    alphabets = ["ab", "abcdefghij", "abcdeéßжж日😀"]
+    for _ in range(2000):
+        alphabet = rng.choice(alphabets)
+        s1 = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+        s2 = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+        assert _levenshtein_py(s1, s2) == _levenshtein_dp(s1, s2), (s1, s2)
+
+def test_score_cutoff_caps_distance():
+    assert levenshtein_distance("google", "googie", score_cutoff=2) == 1
+    assert levenshtein_distance("google", "example", score_cutoff=2) == 3
+
+def test_score_cutoff_caps_distance_without_rapidfuzz(monkeypatch):
+    monkeypatch.setattr(email_checker, "Levenshtein", None)
+    assert levenshtein_distance("google", "googie") == 1
+    assert levenshtein_distance("google", "googie", score_cutoff=2) == 1
+    assert levenshtein_distance("google", "example", score_cutoff=2) == 3
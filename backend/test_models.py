@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select
+
+from backend.models import Base, ScanCounter, ScanLog, upgrade_schema
+
+def _counters(engine):
+    with engine.connect() as conn:
+        rows = conn.execute(select(ScanCounter.scan_type, ScanCounter.verdict, ScanCounter.count))
+        return {(scan_type, verdict): count for scan_type, verdict, count in rows}
+
+def test_upgrade_backfills_counters_from_existing_logs():
+    engine = create_engine("sqlite:///" + os.path.join(tempfile.mkdtemp(), "upgrade.db"))
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(ScanLog), [
+            # Rows written before the verdict column existed keep it in the result JSON
+            {"scan_type": "URL", "input_value": "a", "verdict": None, "result": '{"verdict": "safe"}', "created_at": now},
+            {"scan_type": "URL", "input_value": "b", "verdict": None, "result": '{"verdict": "Suspicious"}', "created_at": now},
+            {"scan_type": "SMS", "input_value": "c", "verdict": "phishing", "result": "{}", "created_at": now},
+            {"scan_type": "SMS", "input_value": "d", "verdict": None, "result": "not json", "created_at": now},
+        ])
+
+    upgrade_schema(engine)
+    expected = {("url", "safe"): 1, ("url", "suspicious"): 1, ("sms", "phishing"): 1, ("sms", "safe"): 1}
+    assert _counters(engine) == expected
+
+    # Counters that already exist are never backfilled twice
+    upgrade_schema(engine)
+    assert _counters(engine) == expected
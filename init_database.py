@@ -13,12 +13,13 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from backend.db import engine
-from backend.models import Base
+from backend.models import Base, upgrade_schema
 
 def init_database():
     """Create all database tables"""
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
     print("✓ Database tables created successfully!")
     print(f"Database location: {engine.url}")
 
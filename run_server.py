@@ -9,7 +9,7 @@ import os
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from backend.app import app
+from backend.main import serve_app
 
 if __name__ == "__main__":
     print("=" * 50)
@@ -18,4 +18,4 @@ if __name__ == "__main__":
     print("Server starting on http://0.0.0.0:5000")
     print("Dashboard: http://127.0.0.1:5000")
     print("Press Ctrl+C to stop")
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    serve_app()
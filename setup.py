@@ -16,6 +16,12 @@ setup(
         "requests==2.31.0",
         "itsdangerous==2.1.2",
         "python-dotenv==1.0.0",
+        "cachetools==5.3.3",
+        "orjson==3.10.12",
+        "pyahocorasick==2.1.0",
+        "rapidfuzz==3.9.7",
+        "waitress==3.0.0",
+        "argon2-cffi==23.1.0",
     ],
     python_requires=">=3.7",
 )